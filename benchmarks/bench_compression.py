@@ -0,0 +1,57 @@
+import os
+import random
+import sys
+import timeit
+sys.path.insert(0, os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+from flask_app.compression import brotli, compress
+from flask_app.resource_classes import encode_joke_row
+from flask_app.response_cache import LRUCacheBackend
+
+
+SIZES = (10, 50, 500, 5000)
+REPEAT = 20
+LEVELS = [('gzip', 1), ('gzip', 6), ('gzip', 9)]
+if brotli is not None:
+    LEVELS.extend([('br', 1), ('br', 4), ('br', 11)])
+SUBJECTS = ('Chuck Norris', 'A programmer', 'The compiler', 'My cat',
+            'The database', 'Every recursion')
+VERBS = ('can divide by', 'once counted to', 'never needs', 'refactored',
+         'deleted', 'beat the')
+OBJECTS = ('zero', 'infinity twice', 'a debugger', 'the halting problem',
+           'production on Friday', 'null pointers with a roundhouse kick')
+
+
+def make_body(count):
+    random.seed(count)
+    rows = [(i, 1, '{0} {1} {2}. #{3}'.format(
+        random.choice(SUBJECTS), random.choice(VERBS),
+        random.choice(OBJECTS), i)) for i in xrange(1, count + 1)]
+    return '{{"jokes":[{0}],"next":null}}\n'.format(
+        ','.join(encode_joke_row(row) for row in rows))
+
+
+def best_ms(function):
+    return min(timeit.repeat(function, number=1, repeat=REPEAT)) * 1000
+
+
+def main():
+    cache = LRUCacheBackend()
+    print('{0:>6} {1:>9} {2:>8} {3:>9} {4:>7} {5:>11} {6:>10}'.format(
+        'jokes', 'encoding', 'raw', 'sent', 'saved', 'compress', 'cache hit'))
+    for size in SIZES:
+        body = make_body(size)
+        for encoding, level in LEVELS:
+            compressed = compress(body, encoding, level)
+            cache.set(encoding, size, (compressed, ()))
+            compress_ms = best_ms(lambda: compress(body, encoding, level))
+            hit_ms = best_ms(lambda: cache.get(encoding, size))
+            print('{0:>6} {1:>7}-{2} {3:>8} {4:>9} {5:>6.1f}% {6:>8.3f} ms '
+                  '{7:>7.4f} ms'.format(
+                      size, encoding, level, len(body), len(compressed),
+                      100.0 * (len(body) - len(compressed)) / len(body),
+                      compress_ms, hit_ms))
+
+
+if __name__ == '__main__':
+    main()
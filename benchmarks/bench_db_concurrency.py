@@ -0,0 +1,110 @@
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker, scoped_session
+from flask_app.models import Base, UserModel, JokeModel, make_engine
+
+
+DURATION = 5
+WRITERS = 4
+READERS = 8
+USERS_COUNT = 100
+
+
+class Counters:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reads = 0
+        self.writes = 0
+        self.locked = 0
+
+    def add(self, name):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+def seed(engine):
+    engine.execute(UserModel.__table__.insert(),
+                   [{'id_': i, 'username': 'user{0}'.format(i),
+                     'password_hash': 'x'}
+                    for i in xrange(1, USERS_COUNT + 1)])
+
+
+def writer(session, counters, deadline, number):
+    i = 0
+    while time.time() < deadline:
+        i += 1
+        try:
+            session.add(JokeModel(user_id=i % USERS_COUNT + 1,
+                                  text='joke {0}-{1}'.format(number, i)))
+            session.commit()
+            counters.add('writes')
+        except OperationalError:
+            session.rollback()
+            counters.add('locked')
+    session.remove()
+
+
+def reader(session, counters, deadline):
+    i = 0
+    while time.time() < deadline:
+        i += 1
+        try:
+            jokes = session.query(JokeModel)
+            jokes.filter(JokeModel.user_id == i % USERS_COUNT + 1).all()
+            session.rollback()
+            counters.add('reads')
+        except OperationalError:
+            session.rollback()
+            counters.add('locked')
+    session.remove()
+
+
+def run(name, engine, duration, writers, readers):
+    Base.metadata.create_all(engine)
+    seed(engine)
+    session = scoped_session(sessionmaker(bind=engine))
+    counters = Counters()
+    deadline = time.time() + duration
+    threads = [threading.Thread(target=writer,
+                                args=(session, counters, deadline, i))
+               for i in xrange(writers)]
+    threads += [threading.Thread(target=reader,
+                                 args=(session, counters, deadline))
+                for i in xrange(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+    print('{0}: {1:.0f} writes/s, {2:.0f} reads/s, {3} locked errors'.format(
+        name, counters.writes / float(duration),
+        counters.reads / float(duration), counters.locked))
+
+
+def main():
+    duration = int(sys.argv[1]) if len(sys.argv) > 1 else DURATION
+    writers = int(sys.argv[2]) if len(sys.argv) > 2 else WRITERS
+    readers = int(sys.argv[3]) if len(sys.argv) > 3 else READERS
+    workdir = tempfile.mkdtemp()
+    try:
+        url = 'sqlite:///' + os.path.join(workdir, 'default.db')
+        run('default engine', create_engine(url), duration, writers,
+            readers)
+        url = 'sqlite:///' + os.path.join(workdir, 'tuned.db')
+        run('WAL + pragmas', make_engine(url, pool_size=writers + readers),
+            duration, writers, readers)
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+import os
+import random
+import shutil
+import sys
+import tempfile
+import timeit
+sys.path.insert(0, os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from flask_app.models import Base, UserModel, JokeModel, upgrade_schema
+
+
+JOKES_COUNT = 1000000
+USERS_COUNT = 10000
+CHUNK_SIZE = 50000
+LOOKUPS = 200
+
+
+def seed(engine, jokes_count, users_count):
+    engine.execute(UserModel.__table__.insert(),
+                   [{'id_': i, 'username': 'user{0}'.format(i),
+                     'password_hash': 'x'}
+                    for i in xrange(1, users_count + 1)])
+    for start in xrange(0, jokes_count, CHUNK_SIZE):
+        stop = min(start + CHUNK_SIZE, jokes_count)
+        engine.execute(JokeModel.__table__.insert(),
+                       [{'user_id': i % users_count + 1,
+                         'text': 'joke {0}'.format(i)}
+                        for i in xrange(start, stop)])
+
+
+def list_with_join(session, user_id):
+    jokes = session.query(JokeModel)
+    jokes = jokes.join(UserModel, JokeModel.user_id == UserModel.id_)
+    return jokes.filter(JokeModel.user_id == user_id).all()
+
+
+def list_by_index(session, user_id):
+    jokes = session.query(JokeModel)
+    return jokes.filter(JokeModel.user_id == user_id).all()
+
+
+def measure(session, list_jokes, user_ids):
+    def run():
+        for user_id in user_ids:
+            list_jokes(session, user_id)
+            session.expunge_all()
+    return timeit.timeit(run, number=1) / len(user_ids) * 1000
+
+
+def main():
+    jokes_count = int(sys.argv[1]) if len(sys.argv) > 1 else JOKES_COUNT
+    users_count = int(sys.argv[2]) if len(sys.argv) > 2 else USERS_COUNT
+    workdir = tempfile.mkdtemp()
+    try:
+        engine = create_engine('sqlite:///' +
+                               os.path.join(workdir, 'bench.db'))
+        Base.metadata.create_all(engine)
+        engine.execute('DROP INDEX ix_jokes_user_id')
+        print('seeding {0} jokes for {1} users'.format(jokes_count,
+                                                       users_count))
+        seed(engine, jokes_count, users_count)
+        session = sessionmaker(bind=engine)()
+        user_ids = [random.randint(1, users_count) for i in xrange(LOOKUPS)]
+        before = measure(session, list_with_join, user_ids)
+        upgrade_schema(engine)
+        after = measure(session, list_by_index, user_ids)
+        print('before (join, no index): {0:.3f} ms/list'.format(before))
+        print('after (index, no join):  {0:.3f} ms/list'.format(after))
+        session.close()
+        engine.dispose()
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+import os
+import random
+import shutil
+import sys
+import tempfile
+import timeit
+sys.path.insert(0, os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from flask_app import create_app, resource_classes
+from flask_app.models import Base, UserModel, JokeModel, create_search_index
+
+
+JOKES_COUNT = 1000000
+USERS_COUNT = 1000
+CHUNK_SIZE = 50000
+LIMIT = 50
+REPEAT = 20
+MAX_CANDIDATES = resource_classes.JokeSearch.MAX_CANDIDATES
+WORDS_COUNT = 20000
+WORDS_PER_JOKE = 8
+SYLLABLES = ('ba', 'co', 'de', 'fi', 'gu', 'ka', 'lo', 'mi', 'nu', 're',
+             'sa', 'to', 'vi', 'xe', 'yo', 'zu')
+
+
+def make_words(count):
+    words = []
+    for i in xrange(count):
+        syllables = []
+        while True:
+            i, index = divmod(i, len(SYLLABLES))
+            syllables.append(SYLLABLES[index])
+            if not i:
+                break
+        words.append(''.join(syllables))
+    return words
+
+
+WORDS = make_words(WORDS_COUNT)
+QUERIES = (WORDS[5000], WORDS[50], WORDS[50] + ' ' + WORDS[60], WORDS[1])
+
+
+def seed(engine, jokes_count):
+    random.seed(0)
+    engine.execute(UserModel.__table__.insert(),
+                   [{'id_': i, 'username': 'user{0}'.format(i),
+                     'password_hash': 'x'}
+                    for i in xrange(1, USERS_COUNT + 1)])
+    for start in xrange(0, jokes_count, CHUNK_SIZE):
+        stop = min(start + CHUNK_SIZE, jokes_count)
+        engine.execute(JokeModel.__table__.insert(), [
+            {'user_id': i % USERS_COUNT + 1,
+             'text': '{0} {1}'.format(' '.join(
+                 WORDS[int(random.paretovariate(1.0)) % WORDS_COUNT]
+                 for j in xrange(WORDS_PER_JOKE)), i)}
+            for i in xrange(start, stop)])
+
+
+def measure(session, query, account_id, max_candidates=None):
+    jokes = resource_classes.search_jokes(resource_classes.search_terms(query),
+                                          account_id, max_candidates)
+    jokes = jokes.limit(LIMIT)
+    seconds = min(timeit.repeat(lambda: session.execute(jokes).fetchall(),
+                                number=1, repeat=REPEAT))
+    return seconds * 1000
+
+
+def main():
+    jokes_count = int(sys.argv[1]) if len(sys.argv) > 1 else JOKES_COUNT
+    workdir = tempfile.mkdtemp()
+    try:
+        url = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+        engine = create_engine(url)
+        Base.metadata.create_all(engine)
+        seed(engine, jokes_count)
+        create_search_index(engine)
+        session = sessionmaker(bind=engine)()
+        print('{0} jokes, first {1} results, best of {2}, capped at {3} '
+              'candidates'.format(jokes_count, LIMIT, REPEAT, MAX_CANDIDATES))
+        app = create_app({'DATABASE_URL': url})
+        database = app.extensions['database']
+        with app.app_context():
+            for query in QUERIES:
+                for account_id in (None, 1):
+                    database.full_text_search = False
+                    like = measure(session, query, account_id)
+                    database.full_text_search = True
+                    exact = measure(session, query, account_id)
+                    capped = measure(session, query, account_id,
+                                     MAX_CANDIDATES)
+                    print('{0!r:>12} {1:>6}: LIKE {2:8.2f} ms, FTS5 {3:8.2f} '
+                          'ms, FTS5 capped {4:6.2f} ms'.format(
+                              query,
+                              'global' if account_id is None else 'user',
+                              like, exact, capped))
+        session.close()
+        engine.dispose()
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from flask_app.models import Base, UserModel, JokeModel
+from flask_app.resource_classes import encode_joke_row
+
+
+JOKES_COUNT = 200000
+CHUNK_SIZE = 50000
+
+
+def seed(engine, jokes_count):
+    engine.execute(UserModel.__table__.insert(),
+                   [{'id_': 1, 'username': 'user', 'password_hash': 'x'}])
+    for start in xrange(0, jokes_count, CHUNK_SIZE):
+        stop = min(start + CHUNK_SIZE, jokes_count)
+        engine.execute(JokeModel.__table__.insert(),
+                       [{'user_id': 1, 'text': 'joke number {0}'.format(i)}
+                        for i in xrange(start, stop)])
+
+
+def serialize_orm(session):
+    jokes = session.query(JokeModel).filter(JokeModel.user_id == 1)
+    jokes = jokes.order_by(JokeModel.id_).all()
+    return json.dumps({'jokes': [j.serialize for j in jokes]})
+
+
+def serialize_rows(session):
+    jokes = select([JokeModel.id_, JokeModel.user_id, JokeModel.text])
+    jokes = jokes.where(JokeModel.user_id == 1).order_by(JokeModel.id_)
+    return '{{"jokes":[{0}]}}'.format(
+        ','.join(encode_joke_row(row) for row in session.execute(jokes)))
+
+
+def measure(url, serialize, results):
+    engine = create_engine(url)
+    session = sessionmaker(bind=engine)()
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.time()
+    body = serialize(session)
+    elapsed = time.time() - started
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results.put((elapsed, after - before, len(body)))
+
+
+def run(url, serialize, jokes_count):
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=measure,
+                                      args=(url, serialize, results))
+    process.start()
+    elapsed, peak_kb, size = results.get()
+    process.join()
+    print('{0}: {1:.2f} us/row, +{2} KB peak RSS, {3} bytes'.format(
+        serialize.__name__, elapsed / jokes_count * 1e6, peak_kb, size))
+
+
+def main():
+    jokes_count = int(sys.argv[1]) if len(sys.argv) > 1 else JOKES_COUNT
+    workdir = tempfile.mkdtemp()
+    try:
+        url = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+        engine = create_engine(url)
+        Base.metadata.create_all(engine)
+        seed(engine, jokes_count)
+        engine.dispose()
+        print('{0} jokes'.format(jokes_count))
+        run(url, serialize_orm, jokes_count)
+        run(url, serialize_rows, jokes_count)
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 10
+MEASURE = '''
+import json
+import sys
+import time
+started = time.time()
+from flask_app import create_app
+imported = time.time()
+app = create_app()
+response = app.test_client().get('/v1/users/1')
+finished = time.time()
+print(json.dumps({'import': imported - started,
+                  'first_request': finished - imported,
+                  'requests_imported': 'requests' in sys.modules,
+                  'status': response.status_code}))
+'''
+
+
+def measure(url):
+    env = dict(os.environ, JOKES_API_DATABASE_URL=url)
+    output = subprocess.check_output([sys.executable, '-c', MEASURE],
+                                     cwd=ROOT, env=env)
+    return json.loads(output.splitlines()[-1])
+
+
+def report(name, samples):
+    import_times = sorted(sample['import'] for sample in samples)
+    request_times = sorted(sample['first_request'] for sample in samples)
+    print('{0}: import {1:.1f} ms, first request {2:.1f} ms (median of {3})'
+          .format(name, import_times[len(samples) // 2] * 1000,
+                  request_times[len(samples) // 2] * 1000, len(samples)))
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else RUNS
+    workdir = tempfile.mkdtemp()
+    try:
+        cold = []
+        for i in xrange(runs):
+            url = 'sqlite:///' + os.path.join(workdir, 'cold{0}.db'.format(i))
+            cold.append(measure(url))
+        url = 'sqlite:///' + os.path.join(workdir, 'warm.db')
+        measure(url)
+        warm = [measure(url) for i in xrange(runs)]
+        report('new database', cold)
+        report('existing database', warm)
+        print('requests imported before first joke fetch: {0}'.format(
+            any(sample['requests_imported'] for sample in cold + warm)))
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,23 +1,176 @@
-from flask import Flask, jsonify, request, abort
+import os
+from flask import Flask
 from flask_restful import Api
-from resource_classes import Users, User, Jokes, Joke
-from models import session
+from resource_classes import Users, User, Jokes, Joke, JokeSearch, Tokens
+from resource_classes import JokesExport, JokesImport, warm_joke_filter
+from admission import AdmissionControl
+from bloom_filter import BloomFilter
+from compression import ResponseCompressor
+from credential_cache import CredentialCache
+from geek_jokes_api import GeekJokesApi, JokePool
+from logger import Logger
+from metrics import Metrics, stats_collector
+from models import Database, session
+from profiler import RequestProfiler
+from response_cache import ResponseCache
+from token_signer import TokenSigner
 
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'secret key'
-
-
-@app.teardown_request
 def remove_session(ex=None):
     session.remove()
 
-api = Api(app)
-api.add_resource(Users, '/v1/users')
-api.add_resource(User, '/v1/users/<int:account_id>')
-api.add_resource(Jokes, '/v1/users/<int:account_id>/jokes')
-api.add_resource(Joke, '/v1/users/<int:account_id>/jokes/<int:joke_id>')
 
-if __name__ == '__main__':
-    app.run(debug=True)
+def init_components(app):
+    database = Database()
+    credential_cache = CredentialCache()
+    token_signer = TokenSigner()
+    geek_jokes = GeekJokesApi()
+    joke_pool = JokePool(geek_jokes)
+    logger = Logger()
+    response_cache = ResponseCache()
+    metrics = Metrics()
+    profiler = RequestProfiler()
+    admission = AdmissionControl()
+    compressor = ResponseCompressor()
+    joke_filter = BloomFilter()
+    for name, component in (('database', database),
+                            ('credential_cache', credential_cache),
+                            ('token_signer', token_signer),
+                            ('joke_pool', joke_pool),
+                            ('geek_jokes', geek_jokes),
+                            ('logger', logger),
+                            ('response_cache', response_cache),
+                            ('metrics', metrics),
+                            ('profiler', profiler),
+                            ('admission', admission),
+                            ('compression', compressor),
+                            ('joke_filter', joke_filter)):
+        component.init_app(app)
+        app.extensions[name] = component
+
+    geek_jokes.latency_observer = metrics.upstream_latency.observe
+    metrics.add_collector(stats_collector(
+        'jokes_api_credential_cache', 'Credential cache stats.',
+        lambda: credential_cache.stats))
+    metrics.add_collector(stats_collector(
+        'jokes_api_joke_pool', 'Joke pool stats.', lambda: joke_pool.stats))
+    metrics.add_collector(stats_collector(
+        'jokes_api_upstream', 'Geek jokes API stats.',
+        lambda: geek_jokes.stats))
+    metrics.add_collector(stats_collector(
+        'jokes_api_response_cache', 'Response cache stats.',
+        lambda: response_cache.stats))
+    metrics.add_collector(stats_collector(
+        'jokes_api_joke_filter', 'Joke digest Bloom filter stats.',
+        lambda: joke_filter.stats))
+    metrics.add_collector(stats_collector(
+        'jokes_api_admission', 'Admission control stats.',
+        lambda: admission.stats))
+    metrics.add_collector(stats_collector(
+        'jokes_api_compression', 'Response compression stats.',
+        lambda: compressor.stats))
+    metrics.add_collector(stats_collector(
+        'jokes_api_log', 'Request log stats.',
+        lambda: {'dropped': logger.dropped}))
+
+
+def create_app(config=None):
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = (os.environ.get('JOKES_API_SECRET_KEY') or
+                                os.urandom(32))
+    app.config['CREDENTIAL_CACHE_SIZE'] = 1024
+    app.config['CREDENTIAL_CACHE_TTL'] = 300
+    app.config['CREDENTIAL_CACHE_STATS'] = True
+    app.config['TOKEN_EXPIRES_IN'] = 3600
+    app.config['JOKE_POOL_SIZE'] = 20
+    app.config['JOKE_POOL_LOW_WATER_MARK'] = 5
+    app.config['JOKE_POOL_REFILL_WORKERS'] = 2
+    app.config['JOKE_POOL_STATS'] = True
+    app.config['GEEK_JOKES_API_URL'] = (
+        'https://geek-jokes.sameerkumar.website/api')
+    app.config['GEEK_JOKES_RETRY_TIMES'] = 5
+    app.config['GEEK_JOKES_CONNECT_TIMEOUT'] = 3.05
+    app.config['GEEK_JOKES_READ_TIMEOUT'] = 5
+    app.config['GEEK_JOKES_BACKOFF_BASE'] = 0.1
+    app.config['GEEK_JOKES_BACKOFF_MAX'] = 2
+    app.config['GEEK_JOKES_POOL_CONNECTIONS'] = 4
+    app.config['GEEK_JOKES_POOL_MAXSIZE'] = 10
+    app.config['GEEK_JOKES_BREAKER_THRESHOLD'] = 5
+    app.config['GEEK_JOKES_BREAKER_RESET_TIMEOUT'] = 30
+    app.config['GEEK_JOKES_FETCH_WORKERS'] = 4
+    app.config['JOKES_POST_FETCH_WIDTH'] = 1
+    app.config['JOKES_PAGE_SIZE'] = 50
+    app.config['JOKES_MAX_PAGE_SIZE'] = 500
+    app.config['JOKES_STREAM_BATCH_SIZE'] = 100
+    app.config['JOKES_MAX_BULK_COUNT'] = 100
+    app.config['JOKES_SEARCH_MAX_CANDIDATES'] = 2000
+    app.config['JOKES_IMPORT_CHUNK_SIZE'] = 500
+    app.config['JOKE_FILTER_ENABLED'] = True
+    app.config['JOKE_FILTER_CAPACITY'] = 1000000
+    app.config['JOKE_FILTER_ERROR_RATE'] = 0.01
+    app.config['RESPONSE_CACHE_ENABLED'] = True
+    app.config['RESPONSE_CACHE_MAX_BYTES'] = 16 * 1024 * 1024
+    app.config['RESPONSE_CACHE_BACKEND'] = None
+    app.config['LOG_FILE'] = os.environ.get('JOKES_API_LOG_FILE')
+    app.config['LOG_MAX_BYTES'] = 10 * 1024 * 1024
+    app.config['LOG_ROTATE_INTERVAL'] = None
+    app.config['LOG_BACKUP_COUNT'] = 10
+    app.config['LOG_COMPRESS'] = True
+    app.config['LOG_ASYNC'] = True
+    app.config['LOG_QUEUE_SIZE'] = 10000
+    app.config['LOG_BATCH_SIZE'] = 500
+    app.config['LOG_FLUSH_INTERVAL'] = 1.0
+    app.config['LOG_FULL_POLICY'] = 'drop'
+    app.config['METRICS_ENABLED'] = True
+    app.config['METRICS_PATH'] = '/metrics'
+    app.config['METRICS_DIR'] = os.environ.get('JOKES_API_METRICS_DIR')
+    app.config['METRICS_SYNC_INTERVAL'] = 1.0
+    app.config['PROFILE_ENABLED'] = bool(os.environ.get('JOKES_API_PROFILE'))
+    app.config['PROFILE_DIR'] = os.environ.get('JOKES_API_PROFILE_DIR')
+    app.config['PROFILE_SAMPLE_RATE'] = 1.0
+    app.config['PROFILE_URL_PATTERN'] = None
+    app.config['PROFILE_HEADER'] = 'X-Profile'
+    app.config['ADMISSION_ENABLED'] = True
+    app.config['ADMISSION_RETRY_AFTER'] = 1
+    app.config['ADMISSION_MAX_ACCOUNTS'] = 10000
+    app.config['ADMISSION_LIMITS'] = {
+        'Users': {'methods': ['POST'], 'concurrency': 4, 'queue_size': 16,
+                  'queue_timeout': 2.0},
+        'Tokens': {'methods': ['POST'], 'concurrency': 4, 'queue_size': 16,
+                   'queue_timeout': 2.0},
+        'Jokes': {'methods': ['POST'], 'concurrency': 8, 'queue_size': 32,
+                  'queue_timeout': 5.0, 'rate': 5.0, 'burst': 20},
+        'JokesImport': {'methods': ['POST'], 'concurrency': 2,
+                        'queue_size': 4, 'queue_timeout': 5.0}
+    }
+    app.config['COMPRESS_ENABLED'] = True
+    app.config['COMPRESS_MIN_SIZE'] = 1024
+    app.config['COMPRESS_LEVEL'] = 6
+    app.config['COMPRESS_BROTLI_QUALITY'] = 4
+    app.config['COMPRESS_CACHE_MAX_BYTES'] = 8 * 1024 * 1024
+    app.config['COMPRESS_MIMETYPES'] = ('application/json', 'text/plain')
+    app.config['SERVER_HOST'] = '127.0.0.1'
+    app.config['SERVER_PORT'] = 5000
+    app.config['SERVER_WORKERS'] = 4
+    app.config['SERVER_THREADS'] = 1
+    app.config['SERVER_MAX_REQUESTS'] = 0
+    app.config['SERVER_MAX_REQUESTS_JITTER'] = 0
+    app.config['SERVER_GRACEFUL_TIMEOUT'] = 30
+    if config:
+        app.config.update(config)
+    init_components(app)
+    if app.extensions['joke_filter'].enabled:
+        app.before_first_request(warm_joke_filter)
+    app.teardown_appcontext(remove_session)
 
+    api = Api(app)
+    api.add_resource(Users, '/v1/users')
+    api.add_resource(Tokens, '/v1/tokens')
+    api.add_resource(User, '/v1/users/<int:account_id>')
+    api.add_resource(Jokes, '/v1/users/<int:account_id>/jokes')
+    api.add_resource(Joke, '/v1/users/<int:account_id>/jokes/<int:joke_id>')
+    api.add_resource(JokeSearch, '/v1/jokes/search',
+                     '/v1/users/<int:account_id>/jokes/search')
+    api.add_resource(JokesExport, '/v1/users/<int:account_id>/jokes/export')
+    api.add_resource(JokesImport, '/v1/users/<int:account_id>/jokes/import')
+    return app
@@ -0,0 +1,215 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, g, request
+from werkzeug.exceptions import ServiceUnavailable, TooManyRequests
+
+
+def retry_after_headers(headers, seconds):
+    return headers + [('Retry-After', str(int(math.ceil(seconds))))]
+
+
+class Overloaded(ServiceUnavailable):
+
+    def __init__(self, description, retry_after):
+        ServiceUnavailable.__init__(self, description)
+        self.retry_after = retry_after
+
+    def get_headers(self, environ=None):
+        return retry_after_headers(
+            ServiceUnavailable.get_headers(self, environ), self.retry_after)
+
+
+class RateLimited(TooManyRequests):
+
+    def __init__(self, description, retry_after):
+        TooManyRequests.__init__(self, description)
+        self.retry_after = retry_after
+
+    def get_headers(self, environ=None):
+        return retry_after_headers(
+            TooManyRequests.get_headers(self, environ), self.retry_after)
+
+
+class ConcurrencyLimiter:
+
+    def __init__(self, limit, queue_size=0, queue_timeout=0):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self._condition = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+
+    def acquire(self):
+        with self._condition:
+            if self.active < self.limit and not self.waiting:
+                self.active += 1
+                self.admitted += 1
+                return True
+            if self.waiting >= self.queue_size:
+                self.rejected_queue_full += 1
+                return False
+            self.waiting += 1
+            deadline = time.time() + self.queue_timeout
+            try:
+                while self.active >= self.limit:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        self.rejected_timeout += 1
+                        return False
+                    self._condition.wait(remaining)
+                self.active += 1
+                self.admitted += 1
+                return True
+            finally:
+                self.waiting -= 1
+
+    def release(self):
+        with self._condition:
+            self.active -= 1
+            self._condition.notify()
+
+    @property
+    def stats(self):
+        with self._condition:
+            return {
+                'limit': self.limit,
+                'active': self.active,
+                'waiting': self.waiting,
+                'admitted': self.admitted,
+                'rejected_queue_full': self.rejected_queue_full,
+                'rejected_timeout': self.rejected_timeout
+            }
+
+
+class TokenBuckets:
+
+    def __init__(self, rate, burst, max_keys):
+        self.rate = float(rate)
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = 0
+
+    def take(self, key):
+        now = time.time()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0
+                self.allowed += 1
+            else:
+                wait = (1 - tokens) / self.rate
+                self.rejected += 1
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    @property
+    def stats(self):
+        with self._lock:
+            return {
+                'rate': self.rate,
+                'burst': self.burst,
+                'accounts': len(self._buckets),
+                'allowed': self.allowed,
+                'rejected': self.rejected
+            }
+
+
+class AdmissionControl:
+
+    ENABLED = True
+    LIMITS = {}
+    METHODS = ('POST',)
+    RETRY_AFTER = 1
+    MAX_ACCOUNTS = 10000
+
+    def __init__(self):
+        self.enabled = self.ENABLED
+        self.retry_after = self.RETRY_AFTER
+        self.max_accounts = self.MAX_ACCOUNTS
+        self.configure(self.LIMITS)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('ADMISSION_ENABLED', self.enabled)
+        self.retry_after = app.config.get('ADMISSION_RETRY_AFTER',
+                                          self.retry_after)
+        self.max_accounts = app.config.get('ADMISSION_MAX_ACCOUNTS',
+                                           self.max_accounts)
+        self.configure(app.config.get('ADMISSION_LIMITS', self.LIMITS))
+        if not self.enabled:
+            return
+        app.before_request(self._admit)
+        app.teardown_request(self._release)
+
+    def configure(self, limits):
+        self.methods = {}
+        self.limiters = {}
+        self.buckets = {}
+        for resource, limit in limits.items():
+            self.methods[resource] = set(
+                method.upper() for method in limit.get('methods',
+                                                       self.METHODS))
+            if limit.get('concurrency'):
+                self.limiters[resource] = ConcurrencyLimiter(
+                    limit['concurrency'], limit.get('queue_size', 0),
+                    limit.get('queue_timeout', 0))
+            if limit.get('rate'):
+                self.buckets[resource] = TokenBuckets(
+                    limit['rate'], limit.get('burst', 1), self.max_accounts)
+
+    def _resource(self):
+        view = current_app.view_functions.get(request.endpoint)
+        view_class = getattr(view, 'view_class', None)
+        if view_class is None:
+            return None
+        resource = view_class.__name__
+        if request.method not in self.methods.get(resource, ()):
+            return None
+        return resource
+
+    def _admit(self):
+        limiter = self.limiters.get(self._resource())
+        if limiter is None:
+            return
+        if not limiter.acquire():
+            raise Overloaded('server is busy, try again later',
+                             self.retry_after)
+        g.admission_limiter = limiter
+
+    def _release(self, ex=None):
+        limiter = g.pop('admission_limiter', None)
+        if limiter is not None:
+            limiter.release()
+
+    def throttle(self, account_id):
+        if not self.enabled:
+            return
+        buckets = self.buckets.get(self._resource())
+        if buckets is None:
+            return
+        wait = buckets.take(account_id)
+        if wait:
+            raise RateLimited('too many requests for this account', wait)
+
+    @property
+    def stats(self):
+        stats = {}
+        for resource, limiter in self.limiters.items():
+            resource_stats = stats.setdefault(resource.lower(), {})
+            resource_stats['concurrency'] = limiter.stats
+        for resource, buckets in self.buckets.items():
+            resource_stats = stats.setdefault(resource.lower(), {})
+            resource_stats['rate_limit'] = buckets.stats
+        return stats
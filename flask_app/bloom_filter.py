@@ -0,0 +1,77 @@
+import math
+import threading
+
+
+class BloomFilter:
+
+    ENABLED = True
+    CAPACITY = 1000000
+    ERROR_RATE = 0.01
+
+    def __init__(self, capacity=None, error_rate=None):
+        self.enabled = self.ENABLED
+        self.capacity = self.CAPACITY if capacity is None else capacity
+        self.error_rate = self.ERROR_RATE if error_rate is None else error_rate
+        self._lock = threading.Lock()
+        self._allocate()
+
+    def init_app(self, app):
+        self.enabled = app.config.get('JOKE_FILTER_ENABLED', self.enabled)
+        capacity = app.config.get('JOKE_FILTER_CAPACITY', self.capacity)
+        error_rate = app.config.get('JOKE_FILTER_ERROR_RATE',
+                                    self.error_rate)
+        if (capacity, error_rate) != (self.capacity, self.error_rate):
+            self.capacity = capacity
+            self.error_rate = error_rate
+            self._allocate()
+
+    def _allocate(self):
+        with self._lock:
+            self.size = int(math.ceil(-self.capacity *
+                                      math.log(self.error_rate) /
+                                      math.log(2) ** 2))
+            self.hash_count = max(1, int(round(
+                float(self.size) / self.capacity * math.log(2))))
+            self._bits = bytearray((self.size + 7) // 8)
+            self.count = 0
+            self.ready = False
+
+    def _positions(self, digest):
+        value = int(digest[:32], 16)
+        first, second = value >> 64, value & 0xffffffffffffffff | 1
+        return [(first + i * second) % self.size
+                for i in xrange(self.hash_count)]
+
+    def add(self, digest):
+        positions = self._positions(digest)
+        with self._lock:
+            for position in positions:
+                self._bits[position >> 3] |= 1 << (position & 7)
+            self.count += 1
+
+    def warm(self, digests):
+        with self._lock:
+            self._bits = bytearray(len(self._bits))
+            self.count = 0
+            self.ready = False
+        for digest in digests:
+            self.add(digest)
+        self.ready = True
+
+    def might_contain(self, digest):
+        if not (self.enabled and self.ready):
+            return True
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(digest))
+
+    @property
+    def stats(self):
+        with self._lock:
+            return {
+                'ready': int(self.ready),
+                'count': self.count,
+                'capacity': self.capacity,
+                'size_bytes': len(self._bits),
+                'hash_count': self.hash_count
+            }
@@ -0,0 +1,122 @@
+import threading
+import time
+import zlib
+from flask import request
+from .response_cache import LRUCacheBackend
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def compress(data, encoding, level):
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def decompress(data, encoding):
+    if encoding == 'br':
+        return brotli.decompress(data)
+    return zlib.decompress(data, GZIP_WBITS)
+
+
+class ResponseCompressor:
+
+    ENABLED = True
+    MIN_SIZE = 1024
+    LEVEL = 6
+    BROTLI_QUALITY = 4
+    CACHE_MAX_BYTES = 8 * 1024 * 1024
+    MIMETYPES = ('application/json', 'text/plain')
+
+    def __init__(self):
+        self.enabled = self.ENABLED
+        self.min_size = self.MIN_SIZE
+        self.level = self.LEVEL
+        self.brotli_quality = self.BROTLI_QUALITY
+        self.mimetypes = self.MIMETYPES
+        self.cache = LRUCacheBackend(self.CACHE_MAX_BYTES)
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def init_app(self, app):
+        self.enabled = app.config.get('COMPRESS_ENABLED', self.enabled)
+        self.min_size = app.config.get('COMPRESS_MIN_SIZE', self.min_size)
+        self.level = app.config.get('COMPRESS_LEVEL', self.level)
+        self.brotli_quality = app.config.get('COMPRESS_BROTLI_QUALITY',
+                                             self.brotli_quality)
+        self.mimetypes = app.config.get('COMPRESS_MIMETYPES', self.mimetypes)
+        self.cache = LRUCacheBackend(app.config.get(
+            'COMPRESS_CACHE_MAX_BYTES', self.cache.max_bytes))
+        self.reset_stats()
+        if self.enabled:
+            app.after_request(self.compress_response)
+
+    @property
+    def encodings(self):
+        return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    def reset_stats(self):
+        with self._lock:
+            self.compressed = 0
+            self.cache_hits = 0
+            self.bytes_in = 0
+            self.bytes_out = 0
+            self.compress_seconds = 0.0
+
+    def _level(self, encoding):
+        return self.brotli_quality if encoding == 'br' else self.level
+
+    def compress_response(self, response):
+        if (response.status_code != 200 or response.direct_passthrough or
+                response.is_streamed or
+                'Content-Encoding' in response.headers or
+                response.mimetype not in self.mimetypes):
+            return response
+        response.vary.add('Accept-Encoding')
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+        encoding = request.accept_encodings.best_match(self.encodings)
+        if encoding is None:
+            return response
+        etag, weak = response.get_etag()
+        if weak:
+            etag = None
+        body = self.cache.get(encoding, etag) if etag else None
+        if body is not None:
+            body = body[0]
+            with self._lock:
+                self.cache_hits += 1
+        else:
+            started = time.time()
+            body = compress(data, encoding, self._level(encoding))
+            elapsed = time.time() - started
+            if etag:
+                self.cache.set(encoding, etag, (body, ()))
+            with self._lock:
+                self.compressed += 1
+                self.bytes_in += len(data)
+                self.bytes_out += len(body)
+                self.compress_seconds += elapsed
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    @property
+    def stats(self):
+        with self._lock:
+            stats = {
+                'compressed': self.compressed,
+                'cache_hits': self.cache_hits,
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out,
+                'compress_seconds': self.compress_seconds
+            }
+        stats['cache'] = self.cache.stats
+        return stats
@@ -0,0 +1,86 @@
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class CredentialCache:
+
+    MAX_SIZE = 1024
+    TTL_SECONDS = 300
+    COUNT_STATS = True
+
+    def __init__(self, max_size=None, ttl=None, count_stats=None):
+        self.max_size = self.MAX_SIZE if max_size is None else max_size
+        self.ttl = self.TTL_SECONDS if ttl is None else ttl
+        self.count_stats = (self.COUNT_STATS if count_stats is None
+                            else count_stats)
+        self._key = os.urandom(32)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        self.max_size = app.config.get('CREDENTIAL_CACHE_SIZE',
+                                       self.max_size)
+        self.ttl = app.config.get('CREDENTIAL_CACHE_TTL', self.ttl)
+        self.count_stats = app.config.get('CREDENTIAL_CACHE_STATS',
+                                          self.count_stats)
+        self.clear()
+
+    def _digest(self, password_hash, password):
+        if isinstance(password, unicode):
+            password = password.encode('utf-8')
+        message = '{0}\0{1}'.format(password_hash, password)
+        return hmac.new(self._key, message, hashlib.sha256).digest()
+
+    def check(self, username, password_hash, password):
+        if self.max_size <= 0 or self.ttl <= 0:
+            return False
+        digest = self._digest(password_hash, password)
+        with self._lock:
+            entry = self._entries.pop(username, None)
+            hit = False
+            if entry is not None and entry[1] > time.time():
+                self._entries[username] = entry
+                hit = hmac.compare_digest(entry[0], digest)
+            if self.count_stats:
+                if hit:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+            return hit
+
+    def add(self, username, password_hash, password):
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        digest = self._digest(password_hash, password)
+        with self._lock:
+            self._entries.pop(username, None)
+            self._entries[username] = (digest, time.time() + self.ttl)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, username):
+        with self._lock:
+            self._entries.pop(username, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses
+            }
@@ -1 +1,3 @@
+from .circuit_breaker import CircuitBreaker
 from .geek_jokes_api import GeekJokesApi
+from .joke_pool import JokePool
@@ -1,18 +1,156 @@
-import requests
 import logging
+import random
+import threading
+import time
+from .circuit_breaker import CircuitBreaker
 
 
 class GeekJokesApi:
     API_URL = 'https://geek-jokes.sameerkumar.website/api'
     OK_STATUS_CODE = 200
     RETRY_TIMES = 5
+    CONNECT_TIMEOUT = 3.05
+    READ_TIMEOUT = 5
+    BACKOFF_BASE = 0.1
+    BACKOFF_MAX = 2
+    POOL_CONNECTIONS = 4
+    POOL_MAXSIZE = 10
+    FETCH_WORKERS = 4
+
+    def __init__(self, api_url=None, breaker=None):
+        self.api_url = self.API_URL if api_url is None else api_url
+        self.retry_times = self.RETRY_TIMES
+        self.timeout = (self.CONNECT_TIMEOUT, self.READ_TIMEOUT)
+        self.backoff_base = self.BACKOFF_BASE
+        self.backoff_max = self.BACKOFF_MAX
+        self.breaker = CircuitBreaker() if breaker is None else breaker
+        self.pool_connections = self.POOL_CONNECTIONS
+        self.pool_maxsize = self.POOL_MAXSIZE
+        self._session = None
+        self.fetch_workers = self.FETCH_WORKERS
+        self._fetch_pool = None
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.latency_observer = None
+
+    def init_app(self, app):
+        self.api_url = app.config.get('GEEK_JOKES_API_URL', self.api_url)
+        self.retry_times = app.config.get('GEEK_JOKES_RETRY_TIMES',
+                                          self.retry_times)
+        self.timeout = (
+            app.config.get('GEEK_JOKES_CONNECT_TIMEOUT', self.timeout[0]),
+            app.config.get('GEEK_JOKES_READ_TIMEOUT', self.timeout[1]))
+        self.backoff_base = app.config.get('GEEK_JOKES_BACKOFF_BASE',
+                                           self.backoff_base)
+        self.backoff_max = app.config.get('GEEK_JOKES_BACKOFF_MAX',
+                                          self.backoff_max)
+        self.breaker.failure_threshold = app.config.get(
+            'GEEK_JOKES_BREAKER_THRESHOLD', self.breaker.failure_threshold)
+        self.breaker.reset_timeout = app.config.get(
+            'GEEK_JOKES_BREAKER_RESET_TIMEOUT', self.breaker.reset_timeout)
+        self.fetch_workers = app.config.get('GEEK_JOKES_FETCH_WORKERS',
+                                            self.fetch_workers)
+        self.pool_connections = app.config.get('GEEK_JOKES_POOL_CONNECTIONS',
+                                               self.pool_connections)
+        self.pool_maxsize = app.config.get('GEEK_JOKES_POOL_MAXSIZE',
+                                           self.pool_maxsize)
+        with self._lock:
+            session, self._session = self._session, None
+        if session is not None:
+            session.close()
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._make_session(self.pool_connections,
+                                                       self.pool_maxsize)
+        return self._session
+
+    def _make_session(self, pool_connections, pool_maxsize):
+        import requests
+        from requests.adapters import HTTPAdapter
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections,
+                              pool_maxsize=pool_maxsize)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _backoff(self, attempt):
+        limit = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        time.sleep(random.uniform(0, limit))
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _observe(self, started, outcome):
+        if self.latency_observer is not None:
+            self.latency_observer(time.time() - started, outcome)
 
     def get_a_joke(self):
-        for i in xrange(self.RETRY_TIMES):
+        from requests import RequestException
+        self._count('calls')
+        for i in xrange(self.retry_times):
+            if not self.breaker.allow_request():
+                return None
+            if i > 0:
+                self._count('retries')
+            started = time.time()
             try:
-                new_joke = requests.get(self.API_URL)
+                new_joke = self.session.get(self.api_url,
+                                            timeout=self.timeout)
                 if new_joke.status_code == self.OK_STATUS_CODE:
+                    self._observe(started, 'ok')
+                    self.breaker.record_success()
                     return new_joke.text.strip()
-            except Exception as e:
+                self._observe(started, 'bad_status')
+            except RequestException as e:
+                self._observe(started, 'error')
                 logging.error(e)
+            self._count('failures')
+            self.breaker.record_failure()
+            if i + 1 < self.retry_times:
+                self._backoff(i)
+
+    def _get_fetch_pool(self):
+        with self._lock:
+            if self._fetch_pool is None:
+                from multiprocessing.pool import ThreadPool
+                self._fetch_pool = ThreadPool(self.fetch_workers)
+            return self._fetch_pool
+
+    def get_jokes(self, count):
+        if count <= 1:
+            return [self.get_a_joke() for i in xrange(count)]
+        fetch_pool = self._get_fetch_pool()
+        return fetch_pool.map(lambda i: self.get_a_joke(), xrange(count))
 
+    @property
+    def stats(self):
+        connections = 0
+        requests_sent = 0
+        adapters = self._session.adapters.values() if self._session else ()
+        for adapter in set(adapters):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                try:
+                    pool = pools[key]
+                except KeyError:
+                    continue
+                connections += pool.num_connections
+                requests_sent += pool.num_requests
+        with self._lock:
+            stats = {
+                'calls': self.calls,
+                'retries': self.retries,
+                'failures': self.failures,
+                'connections': connections,
+                'reused_connections': max(requests_sent - connections, 0)
+            }
+        stats['breaker'] = self.breaker.stats
+        return stats
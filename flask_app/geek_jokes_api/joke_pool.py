@@ -0,0 +1,130 @@
+import logging
+import threading
+from collections import deque
+
+
+class JokePool:
+
+    SIZE = 20
+    LOW_WATER_MARK = 5
+    REFILL_WORKERS = 2
+    COUNT_STATS = True
+
+    def __init__(self, api, size=None, low_water_mark=None,
+                 refill_workers=None, count_stats=None):
+        self.api = api
+        self.size = self.SIZE if size is None else size
+        self.low_water_mark = (self.LOW_WATER_MARK if low_water_mark is None
+                               else low_water_mark)
+        self.refill_workers = (self.REFILL_WORKERS if refill_workers is None
+                               else refill_workers)
+        self.count_stats = (self.COUNT_STATS if count_stats is None
+                            else count_stats)
+        self._jokes = deque()
+        self._texts = set()
+        self._lock = threading.Lock()
+        self._active_workers = 0
+        self.hits = 0
+        self.misses = 0
+        self.refills = 0
+
+    def init_app(self, app):
+        self.size = app.config.get('JOKE_POOL_SIZE', self.size)
+        self.low_water_mark = app.config.get('JOKE_POOL_LOW_WATER_MARK',
+                                             self.low_water_mark)
+        self.refill_workers = app.config.get('JOKE_POOL_REFILL_WORKERS',
+                                             self.refill_workers)
+        self.count_stats = app.config.get('JOKE_POOL_STATS', self.count_stats)
+
+    def get_a_joke(self):
+        joke = self.pop()
+        if joke is None:
+            joke = self.api.get_a_joke()
+        return joke
+
+    def get_jokes(self, count):
+        jokes = []
+        while len(jokes) < count:
+            joke = self.pop()
+            if joke is None:
+                break
+            jokes.append(joke)
+        if len(jokes) < count:
+            jokes.extend(self.api.get_jokes(count - len(jokes)))
+        return jokes
+
+    def pop(self):
+        with self._lock:
+            joke = None
+            if self._jokes:
+                joke = self._jokes.popleft()
+                self._texts.discard(joke)
+            if self.count_stats:
+                if joke is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+            refill = (self.size > 0 and self._active_workers == 0 and
+                      len(self._jokes) <= self.low_water_mark)
+            if refill:
+                self._active_workers = max(self.refill_workers, 1)
+                self.refills += 1
+        if refill:
+            self._start_refill()
+        return joke
+
+    def put_back(self, jokes):
+        with self._lock:
+            returned = []
+            for joke in jokes:
+                if len(self._jokes) + len(returned) >= self.size:
+                    break
+                if joke and joke not in self._texts:
+                    returned.append(joke)
+                    self._texts.add(joke)
+            self._jokes.extendleft(reversed(returned))
+
+    def _start_refill(self):
+        for i in xrange(max(self.refill_workers, 1)):
+            worker = threading.Thread(target=self._refill)
+            worker.daemon = True
+            worker.start()
+
+    def _refill(self):
+        try:
+            for i in xrange(self.size):
+                with self._lock:
+                    if len(self._jokes) >= self.size:
+                        break
+                joke = self.api.get_a_joke()
+                if not joke:
+                    break
+                with self._lock:
+                    if (joke not in self._texts and
+                            len(self._jokes) < self.size):
+                        self._jokes.append(joke)
+                        self._texts.add(joke)
+        except Exception as e:
+            logging.error(e)
+        finally:
+            with self._lock:
+                self._active_workers -= 1
+
+    def clear(self):
+        with self._lock:
+            self._jokes.clear()
+            self._texts.clear()
+            self.hits = 0
+            self.misses = 0
+            self.refills = 0
+
+    @property
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._jokes),
+                'max_size': self.size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'refills': self.refills
+            }
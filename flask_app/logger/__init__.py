@@ -1,2 +1,2 @@
 from .logger import Logger
-
+from .log_reader import LogRecord, parse_date, parse_line, query_log
@@ -0,0 +1,77 @@
+import datetime
+import gzip
+import os
+from collections import namedtuple
+
+
+DATE_FORMATS = ('%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d')
+
+LogRecord = namedtuple('LogRecord', 'username date ip_address url line')
+
+
+def parse_date(text):
+    text = text.strip()[:26]
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(text, date_format)
+        except ValueError:
+            pass
+    return None
+
+
+def parse_line(line):
+    fields = line.rstrip('\n').split('\t')
+    if len(fields) != 4:
+        return None
+    username, date, ip_address, url = fields
+    return LogRecord(username.strip(), parse_date(date), ip_address, url,
+                     line)
+
+
+def read_segment(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as handle:
+        for line in handle:
+            yield line
+
+
+def rotated_at(logger, path):
+    prefix = os.path.basename(logger.filename) + '.'
+    suffix = os.path.basename(path)[len(prefix):]
+    match = logger.ROTATED_SUFFIX_RE.match(suffix)
+    return datetime.datetime.strptime(match.group(1),
+                                      logger.ROTATED_SUFFIX_FORMAT)
+
+
+def log_segments(logger):
+    for path in logger.rotated_segments():
+        yield path, rotated_at(logger, path)
+    if os.path.exists(logger.filename):
+        yield logger.filename, None
+
+
+def query_log(logger, username=None, since=None, until=None, url=None):
+    previous_rotated_at = None
+    for path, segment_rotated_at in log_segments(logger):
+        if (until is not None and previous_rotated_at is not None and
+                previous_rotated_at > until):
+            break
+        previous_rotated_at = segment_rotated_at
+        if (since is not None and segment_rotated_at is not None and
+                segment_rotated_at < since):
+            continue
+        for line in read_segment(path):
+            record = parse_line(line)
+            if record is None:
+                continue
+            if username is not None and record.username != username:
+                continue
+            if url is not None and url not in record.url:
+                continue
+            if since is not None and (record.date is None or
+                                      record.date < since):
+                continue
+            if until is not None and (record.date is None or
+                                      record.date > until):
+                continue
+            yield record
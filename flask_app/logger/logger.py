@@ -1,18 +1,190 @@
+import atexit
 import datetime
+import gzip
+import logging
 import os
+import re
+import shutil
+import threading
+import time
+import Queue
 
 
 class Logger:
 
     LOGFILE = 'log.txt'
+    ASYNC = True
+    QUEUE_SIZE = 10000
+    BATCH_SIZE = 500
+    FLUSH_INTERVAL = 1.0
+    DROP_POLICY = 'drop'
+    BLOCK_POLICY = 'block'
+    FULL_POLICY = DROP_POLICY
+    MAX_BYTES = 10 * 1024 * 1024
+    ROTATE_INTERVAL = None
+    BACKUP_COUNT = 10
+    COMPRESS = True
+    ROTATED_SUFFIX_FORMAT = '%Y%m%d-%H%M%S'
+    ROTATED_SUFFIX_RE = re.compile(r'^(\d{8}-\d{6})(?:\.(\d+))?(?:\.gz)?$')
 
-    def __init__(self):
+    def __init__(self, filename=None):
         basedir = os.path.abspath(os.path.dirname(__file__))
-        self.filename = os.path.join(basedir, self.LOGFILE)
+        self.filename = (os.path.join(basedir, self.LOGFILE)
+                         if filename is None else filename)
+        self.async_writes = self.ASYNC
+        self.batch_size = self.BATCH_SIZE
+        self.flush_interval = self.FLUSH_INTERVAL
+        self.full_policy = self.FULL_POLICY
+        self.queue = Queue.Queue(self.QUEUE_SIZE)
+        self.max_bytes = self.MAX_BYTES
+        self.rotate_interval = self.ROTATE_INTERVAL
+        self.backup_count = self.BACKUP_COUNT
+        self.compress = self.COMPRESS
+        self.dropped = 0
+        self._segment_started = None
+        self._writer = None
+        self._lock = threading.Lock()
+        self._rotate_lock = threading.Lock()
+        atexit.register(self.close)
 
-    def log(self, username, date, ip_address, url):
+    def init_app(self, app):
+        self.close()
+        self.filename = app.config.get('LOG_FILE') or self.filename
+        self.max_bytes = app.config.get('LOG_MAX_BYTES', self.max_bytes)
+        self.rotate_interval = app.config.get('LOG_ROTATE_INTERVAL',
+                                              self.rotate_interval)
+        self.backup_count = app.config.get('LOG_BACKUP_COUNT',
+                                           self.backup_count)
+        self.compress = app.config.get('LOG_COMPRESS', self.compress)
+        self._segment_started = None
+        self.async_writes = app.config.get('LOG_ASYNC', self.async_writes)
+        self.batch_size = app.config.get('LOG_BATCH_SIZE', self.batch_size)
+        self.flush_interval = app.config.get('LOG_FLUSH_INTERVAL',
+                                             self.flush_interval)
+        self.full_policy = app.config.get('LOG_FULL_POLICY', self.full_policy)
+        self.queue = Queue.Queue(app.config.get('LOG_QUEUE_SIZE',
+                                                self.queue.maxsize))
+
+    def format_line(self, username, date, ip_address, url):
         date = date if date else datetime.datetime.now()
-        with open(self.filename, 'a') as handle:
-            handle.write('{0:>10}\t{1}\t{2}\t{3}\n'.format(username, date,
-                                                           ip_address, url))
+        return '{0:>10}\t{1}\t{2}\t{3}\n'.format(username, date, ip_address,
+                                                 url)
+
+    def write_lines(self, lines):
+        with self._rotate_lock:
+            if self._should_rotate():
+                self.rotate()
+            if self._segment_started is None:
+                self._segment_started = time.time()
+            with open(self.filename, 'a') as handle:
+                handle.write(''.join(lines))
+
+    def _should_rotate(self):
+        if not os.path.exists(self.filename):
+            return False
+        if self.max_bytes and os.path.getsize(self.filename) >= self.max_bytes:
+            return True
+        return bool(self.rotate_interval and self._segment_started and
+                    time.time() - self._segment_started >=
+                    self.rotate_interval)
+
+    def rotate(self):
+        suffix = datetime.datetime.now().strftime(self.ROTATED_SUFFIX_FORMAT)
+        rotated = '{0}.{1}'.format(self.filename, suffix)
+        number = 0
+        while os.path.exists(rotated) or os.path.exists(rotated + '.gz'):
+            number += 1
+            rotated = '{0}.{1}.{2}'.format(self.filename, suffix, number)
+        os.rename(self.filename, rotated)
+        self._segment_started = None
+        if self.compress:
+            with open(rotated, 'rb') as source:
+                with gzip.open(rotated + '.gz', 'wb') as target:
+                    shutil.copyfileobj(source, target)
+            os.remove(rotated)
+        self._remove_old_segments()
+
+    def rotated_segments(self):
+        directory, basename = os.path.split(self.filename)
+        prefix = basename + '.'
+        segments = []
+        for name in os.listdir(directory or '.'):
+            match = None
+            if name.startswith(prefix):
+                match = self.ROTATED_SUFFIX_RE.match(name[len(prefix):])
+            if match is not None:
+                key = (match.group(1), int(match.group(2) or 0))
+                segments.append((key, os.path.join(directory, name)))
+        return [path for key, path in sorted(segments)]
+
+    def _remove_old_segments(self):
+        if self.backup_count is None:
+            return
+        segments = self.rotated_segments()
+        for path in segments[:max(len(segments) - self.backup_count, 0)]:
+            os.remove(path)
+
+    def log(self, username, date, ip_address, url):
+        line = self.format_line(username, date, ip_address, url)
+        if not self.async_writes:
+            self.write_lines([line])
+            return
+        self._start_writer()
+        if self.full_policy == self.BLOCK_POLICY:
+            self.queue.put(line)
+            return
+        try:
+            self.queue.put_nowait(line)
+        except Queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def _start_writer(self):
+        if self._writer is not None:
+            return
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_batches,
+                                                args=(self.queue,))
+                self._writer.daemon = True
+                self._writer.start()
+
+    def _write_batches(self, queue):
+        running = True
+        while running:
+            try:
+                lines = [queue.get(timeout=self.flush_interval)]
+            except Queue.Empty:
+                continue
+            deadline = time.time() + self.flush_interval
+            while len(lines) < self.batch_size and lines[-1] is not None:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    lines.append(queue.get(timeout=remaining))
+                except Queue.Empty:
+                    break
+            taken = len(lines)
+            if lines[-1] is None:
+                running = False
+                lines.pop()
+            try:
+                if lines:
+                    self.write_lines(lines)
+            except (IOError, OSError) as e:
+                logging.error(e)
+            finally:
+                for i in xrange(taken):
+                    queue.task_done()
+
+    def flush(self):
+        if self._writer is not None:
+            self.queue.join()
 
+    def close(self):
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self.queue.put(None)
+            writer.join()
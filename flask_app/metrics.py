@@ -0,0 +1,303 @@
+import bisect
+import errno
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from flask import Response, current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from werkzeug.local import LocalProxy
+
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ['{0}="{1}"'.format(name, str(value).replace('\\', '\\\\')
+                                .replace('"', '\\"').replace('\n', '\\n'))
+             for name, value in labels]
+    return '{' + ','.join(pairs) + '}'
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+class Histogram:
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(labelvalues)
+            if counts is None:
+                counts = self._values[labelvalues] = [
+                    [0] * (len(self.buckets) + 1), 0.0]
+            counts[0][index] += 1
+            counts[1] += value
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(k), list(v[0]), v[1]]
+                    for k, v in self._values.items()]
+
+    def render(self, snapshots=None):
+        yield '# HELP {0} {1}'.format(self.name, self.documentation)
+        yield '# TYPE {0} histogram'.format(self.name)
+        if snapshots is None:
+            snapshots = [self.snapshot()]
+        merged = {}
+        for snapshot in snapshots:
+            for labelvalues, counts, total in snapshot:
+                value = merged.setdefault(tuple(labelvalues),
+                                          [[0] * len(counts), 0.0])
+                value[0] = [a + b for a, b in zip(value[0], counts)]
+                value[1] += total
+        for labelvalues, (counts, total) in sorted(merged.items()):
+            labels = zip(self.labelnames, labelvalues)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                yield '{0}_bucket{1} {2}'.format(
+                    self.name,
+                    format_labels(labels + [('le', format_value(bound))]),
+                    cumulative)
+            yield '{0}_sum{1} {2}'.format(self.name, format_labels(labels),
+                                          format_value(total))
+            yield '{0}_count{1} {2}'.format(self.name, format_labels(labels),
+                                            cumulative)
+
+
+def stats_collector(prefix, documentation, get_stats):
+    def collect():
+        lines = []
+        for key, value in sorted(get_stats().items()):
+            name = '{0}_{1}'.format(prefix, key)
+            if isinstance(value, dict):
+                lines.extend(stats_collector(name, documentation,
+                                             lambda: value)())
+            elif isinstance(value, basestring):
+                lines.append('# HELP {0} {1}'.format(name, documentation))
+                lines.append('# TYPE {0} gauge'.format(name))
+                lines.append('{0}{1} 1'.format(
+                    name, format_labels([(key, value)])))
+            elif value is not None:
+                lines.append('# HELP {0} {1}'.format(name, documentation))
+                lines.append('# TYPE {0} gauge'.format(name))
+                lines.append('{0} {1}'.format(name, format_value(value)))
+        return lines
+    return collect
+
+
+def merge_samples(line_lists):
+    families = OrderedDict()
+    for lines in line_lists:
+        for line in lines:
+            if line.startswith('#'):
+                family = families.setdefault(line.split()[2], OrderedDict())
+                family.setdefault(line, None)
+                continue
+            key, value = line.rsplit(' ', 1)
+            family = families.setdefault(key.split('{', 1)[0], OrderedDict())
+            family[key] = (family.get(key) or 0.0) + float(value)
+    return [key if value is None else
+            '{0} {1}'.format(key, format_value(value))
+            for family in families.values() for key, value in family.items()]
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        return e.errno != errno.ESRCH
+    return True
+
+
+class Metrics:
+
+    ENABLED = True
+    PATH = '/metrics'
+    DIRECTORY = None
+    SYNC_INTERVAL = 1.0
+
+    def __init__(self):
+        self.enabled = self.ENABLED
+        self.directory = self.DIRECTORY
+        self.sync_interval = self.SYNC_INTERVAL
+        self.request_latency = Histogram(
+            'jokes_api_request_seconds', 'Request latency.',
+            ('resource', 'method', 'status'))
+        self.sql_latency = Histogram(
+            'jokes_api_sql_statement_seconds', 'SQL statement latency.',
+            ('statement',))
+        self.upstream_latency = Histogram(
+            'jokes_api_upstream_request_seconds',
+            'Geek jokes API request latency.', ('outcome',))
+        self.password_hash_latency = Histogram(
+            'jokes_api_password_hash_seconds', 'Password hash check time.')
+        self.histograms = [self.request_latency, self.sql_latency,
+                           self.upstream_latency, self.password_hash_latency]
+        self.collectors = []
+        self._snapshot_pid = None
+        self._snapshot_name = None
+        self._snapshot_lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config.get('METRICS_ENABLED', self.enabled)
+        self.directory = app.config.get('METRICS_DIR', self.directory)
+        self.sync_interval = app.config.get('METRICS_SYNC_INTERVAL',
+                                            self.sync_interval)
+        if not self.enabled:
+            return
+        app.before_request(self._start_request)
+        app.after_request(self._record_status)
+        app.teardown_request(self._finish_request)
+        app.add_url_rule(app.config.get('METRICS_PATH', self.PATH),
+                         'metrics', self.render_response)
+
+    def add_collector(self, collector):
+        self.collectors.append(collector)
+
+    def _start_request(self):
+        g.metrics_started = time.time()
+
+    def _record_status(self, response):
+        g.metrics_status = response.status_code
+        return response
+
+    def _finish_request(self, ex=None):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return
+        status = g.pop('metrics_status', 500) if ex is None else 500
+        view = current_app.view_functions.get(request.endpoint)
+        view_class = getattr(view, 'view_class', None)
+        resource = (view_class.__name__ if view_class is not None
+                    else request.endpoint or 'unknown')
+        self.request_latency.observe(time.time() - started, resource,
+                                     request.method, status)
+        if self.directory is not None:
+            self._start_sync()
+
+    def observe_statement(self, started, statement):
+        verb = statement.lstrip().split(None, 1)[0].upper()
+        self.sql_latency.observe(time.time() - started, verb)
+
+    def collect(self):
+        lines = []
+        for collector in self.collectors:
+            lines.extend(collector())
+        return lines
+
+    def _start_sync(self):
+        pid = os.getpid()
+        with self._snapshot_lock:
+            if self._snapshot_pid == pid:
+                return
+            self._snapshot_pid = pid
+            self._snapshot_name = '{0}-{1}.json'.format(
+                pid, int(time.time() * 1000000))
+        syncer = threading.Thread(target=self._sync_snapshots)
+        syncer.daemon = True
+        syncer.start()
+
+    def _sync_snapshots(self):
+        while True:
+            time.sleep(self.sync_interval)
+            self.write_snapshot()
+
+    def write_snapshot(self):
+        if self.directory is None:
+            return
+        self._start_sync()
+        data = {'histograms': dict((histogram.name, histogram.snapshot())
+                                   for histogram in self.histograms),
+                'collectors': self.collect()}
+        path = os.path.join(self.directory, self._snapshot_name)
+        try:
+            with self._snapshot_lock:
+                with open(path + '.tmp', 'w') as handle:
+                    json.dump(data, handle)
+                os.rename(path + '.tmp', path)
+        except (IOError, OSError) as e:
+            logging.error(e)
+
+    def read_snapshots(self):
+        snapshots = []
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as handle:
+                    data = json.load(handle)
+            except (IOError, OSError, ValueError) as e:
+                logging.error(e)
+                continue
+            pid = int(name.split('-', 1)[0])
+            snapshots.append((process_alive(pid), data))
+        return snapshots
+
+    def clear_snapshots(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(('.json', '.tmp')):
+                os.remove(os.path.join(self.directory, name))
+
+    def render(self):
+        if self.directory is None:
+            histograms = dict((histogram.name, None)
+                              for histogram in self.histograms)
+            collected = self.collect()
+        else:
+            self.write_snapshot()
+            snapshots = self.read_snapshots()
+            histograms = dict((histogram.name,
+                               [data['histograms'].get(histogram.name, [])
+                                for alive, data in snapshots])
+                              for histogram in self.histograms)
+            collected = merge_samples(data['collectors']
+                                      for alive, data in snapshots if alive)
+        lines = []
+        for histogram in self.histograms:
+            lines.extend(histogram.render(histograms[histogram.name]))
+        lines.extend(collected)
+        return '\n'.join(lines) + '\n'
+
+    def render_response(self):
+        return Response(self.render(), content_type=CONTENT_TYPE)
+
+
+metrics = LocalProxy(lambda: current_app.extensions['metrics'])
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_statement(conn, cursor, statement, parameters, context,
+                    executemany):
+    conn.info['metrics_started'] = time.time()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def finish_statement(conn, cursor, statement, parameters, context,
+                     executemany):
+    started = conn.info.pop('metrics_started', None)
+    if started is None or not has_app_context():
+        return
+    app_metrics = current_app.extensions.get('metrics')
+    if app_metrics is not None and app_metrics.enabled:
+        app_metrics.observe_statement(started, statement)
@@ -1 +1,4 @@
-from .models import database_path, Base, UserModel, JokeModel, session
+from .models import Base, UserModel, JokeModel, Database, database, session
+from .models import get_engine, upgrade_schema, make_engine, reset_after_fork
+from .models import search_table, create_search_index, text_digest
+from .models import insert_ignoring_duplicates
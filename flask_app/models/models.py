@@ -1,8 +1,18 @@
+import hashlib
 import os
-from sqlalchemy import Column, ForeignKey, Integer, String
+import threading
+import unicodedata
+from flask import current_app
+from sqlalchemy import Column, Float, ForeignKey, Integer, MetaData
+from sqlalchemy import String, Table, bindparam, select
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.orm import sessionmaker, scoped_session, validates
+from werkzeug.local import LocalProxy
 from werkzeug.security import generate_password_hash, check_password_hash
 
 
@@ -14,6 +24,8 @@ class UserModel(Base):
     id_ = Column(Integer, primary_key=True)
     username = Column(String(80), unique=True, nullable=False)
     password_hash = Column(String(120), nullable=False)
+    jokes_version = Column(Integer, nullable=False, default=0,
+                           server_default='0')
 
     def hash_password(self, password):
         self.password_hash = generate_password_hash(password)
@@ -32,11 +44,29 @@ class UserModel(Base):
         }
 
 
+def text_digest(text):
+    if isinstance(text, bytes):
+        text = text.decode('utf-8')
+    normalized = u' '.join(unicodedata.normalize('NFKC', text).lower().split())
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+
+def default_text_digest(context):
+    return text_digest(context.current_parameters['text'])
+
+
 class JokeModel(Base):
     __tablename__ = 'jokes'
     id_ = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey('users.id_'))
-    text = Column(String(120), nullable=False, unique=True)
+    user_id = Column(Integer, ForeignKey('users.id_'), index=True)
+    text = Column(String(120), nullable=False)
+    text_digest = Column(String(40), unique=True, index=True,
+                         default=default_text_digest)
+
+    @validates('text')
+    def update_text_digest(self, key, text):
+        self.text_digest = text_digest(text)
+        return text
 
     def __repr__(self):
         return '<Joke %r>' % self.text
@@ -49,10 +79,184 @@ class JokeModel(Base):
             'text': self.text
         }
 
+
+def backfill_text_digests(engine):
+    jokes = JokeModel.__table__
+    missing = engine.execute(select([jokes.c.id_, jokes.c.text]).where(
+        jokes.c.text_digest.is_(None))).fetchall()
+    if not missing:
+        return
+    seen = set(digest for digest, in engine.execute(
+        select([jokes.c.text_digest]).where(
+            jokes.c.text_digest.isnot(None))))
+    updates = []
+    for joke_id, text in missing:
+        digest = text_digest(text)
+        if digest not in seen:
+            seen.add(digest)
+            updates.append({'joke_id': joke_id, 'digest': digest})
+    if updates:
+        engine.execute(jokes.update().where(
+            jokes.c.id_ == bindparam('joke_id')).values(
+                text_digest=bindparam('digest')), updates)
+
+
+def upgrade_schema(engine):
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        existing = set(column['name']
+                       for column in inspector.get_columns(table.name))
+        for column in table.columns:
+            if column.name not in existing:
+                ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                engine.execute('ALTER TABLE {0} ADD COLUMN {1}'.format(
+                    table.name, ddl))
+    backfill_text_digests(engine)
+    for table in Base.metadata.sorted_tables:
+        existing = set(index['name']
+                       for index in inspector.get_indexes(table.name))
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(engine)
+
+
+search_table = Table('jokes_fts', MetaData(),
+                     Column('rowid', Integer, primary_key=True),
+                     Column('text', String),
+                     Column('rank', Float))
+
+SEARCH_INDEX_DDL = (
+    "CREATE VIRTUAL TABLE jokes_fts USING fts5("
+    "text, content='jokes', content_rowid='id_', tokenize='unicode61')",
+    "CREATE TRIGGER jokes_fts_insert AFTER INSERT ON jokes BEGIN "
+    "INSERT INTO jokes_fts(rowid, text) VALUES (new.id_, new.text); END",
+    "CREATE TRIGGER jokes_fts_delete AFTER DELETE ON jokes BEGIN "
+    "INSERT INTO jokes_fts(jokes_fts, rowid, text) "
+    "VALUES ('delete', old.id_, old.text); END",
+    "CREATE TRIGGER jokes_fts_update AFTER UPDATE OF text ON jokes BEGIN "
+    "INSERT INTO jokes_fts(jokes_fts, rowid, text) "
+    "VALUES ('delete', old.id_, old.text); "
+    "INSERT INTO jokes_fts(rowid, text) VALUES (new.id_, new.text); END",
+    "INSERT INTO jokes_fts(jokes_fts) VALUES ('rebuild')",
+)
+
+
+def create_search_index(engine):
+    if engine.dialect.name != 'sqlite':
+        return False
+    if search_table.name in inspect(engine).get_table_names():
+        return True
+    try:
+        with engine.begin() as connection:
+            for ddl in SEARCH_INDEX_DDL:
+                connection.execute(ddl)
+    except OperationalError:
+        return False
+    return True
+
+
+def insert_ignoring_duplicates(table, engine):
+    if engine.dialect.name == 'sqlite':
+        return table.insert().prefix_with('OR IGNORE')
+    if engine.dialect.name == 'mysql':
+        return table.insert().prefix_with('IGNORE')
+    if engine.dialect.name == 'postgresql':
+        return postgresql.insert(table).on_conflict_do_nothing()
+    return table.insert()
+
+SQLITE_PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('busy_timeout', 5000),
+    ('cache_size', -16000),
+)
+
+
+def set_sqlite_pragmas(engine, pragmas):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas:
+            cursor.execute('PRAGMA {0} = {1}'.format(name, value))
+        cursor.close()
+    event.listen(engine, 'connect', on_connect)
+
+
+def make_engine(url, pool_size=5, max_overflow=10, pool_recycle=-1,
+                sqlite_pragmas=SQLITE_PRAGMAS):
+    if not url.startswith('sqlite'):
+        return create_engine(url, pool_size=pool_size,
+                             max_overflow=max_overflow,
+                             pool_recycle=pool_recycle)
+    if url in ('sqlite://', 'sqlite:///:memory:'):
+        return create_engine(url)
+    engine = create_engine(url, poolclass=QueuePool, pool_size=pool_size,
+                           max_overflow=max_overflow,
+                           pool_recycle=pool_recycle,
+                           connect_args={'check_same_thread': False})
+    if sqlite_pragmas:
+        set_sqlite_pragmas(engine, sqlite_pragmas)
+    return engine
+
 basedir = os.path.abspath(os.path.dirname(__file__))
-database_path = 'sqlite:///' + os.path.join(basedir, 'jokes.db')
-engine = create_engine(database_path)
-Base.metadata.create_all(engine)
-Base.metadata.bind = engine
-session = scoped_session(sessionmaker(bind=engine))
 
+
+class Database:
+
+    URL = 'sqlite:///' + os.path.join(basedir, 'jokes.db')
+    POOL_SIZE = 5
+    MAX_OVERFLOW = 10
+    POOL_RECYCLE = -1
+
+    def __init__(self):
+        self.url = os.environ.get('JOKES_API_DATABASE_URL', self.URL)
+        self.pool_size = int(os.environ.get('JOKES_API_DB_POOL_SIZE',
+                                            self.POOL_SIZE))
+        self.max_overflow = int(os.environ.get('JOKES_API_DB_MAX_OVERFLOW',
+                                               self.MAX_OVERFLOW))
+        self.pool_recycle = int(os.environ.get('JOKES_API_DB_POOL_RECYCLE',
+                                               self.POOL_RECYCLE))
+        self.full_text_search = False
+        self._engine = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.url = app.config.get('DATABASE_URL', self.url)
+        self.pool_size = app.config.get('DATABASE_POOL_SIZE', self.pool_size)
+        self.max_overflow = app.config.get('DATABASE_MAX_OVERFLOW',
+                                           self.max_overflow)
+        self.pool_recycle = app.config.get('DATABASE_POOL_RECYCLE',
+                                           self.pool_recycle)
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    engine = make_engine(self.url, self.pool_size,
+                                         self.max_overflow, self.pool_recycle)
+                    Base.metadata.create_all(engine)
+                    upgrade_schema(engine)
+                    self.full_text_search = create_search_index(engine)
+                    self._engine = engine
+        return self._engine
+
+    def create_session(self):
+        return Session(bind=self.engine)
+
+    def reset_after_fork(self):
+        session.remove()
+        if self._engine is not None:
+            self._engine.dispose()
+
+
+Session = sessionmaker()
+database = LocalProxy(lambda: current_app.extensions['database'])
+session = scoped_session(lambda: database.create_session())
+
+
+def get_engine():
+    return database.engine
+
+
+def reset_after_fork():
+    database.reset_after_fork()
@@ -0,0 +1,216 @@
+import errno
+import logging
+import os
+import random
+import select
+import signal
+import socket
+import threading
+import time
+import Queue
+from werkzeug.serving import BaseWSGIServer, select_ip_version
+
+
+class PreforkWSGIServer(BaseWSGIServer):
+
+    multiprocess = True
+    POLL_INTERVAL = 0.5
+
+    def __init__(self, host, port, app, fd, threads=1, max_requests=0):
+        BaseWSGIServer.__init__(self, host, port, app, fd=fd)
+        self.socket.setblocking(0)
+        self.multithread = threads > 1
+        self.max_requests = max_requests
+        self.handled = 0
+        self.running = True
+        self._requests = None
+        if self.multithread:
+            self._requests = Queue.Queue(threads)
+            for i in xrange(threads):
+                thread = threading.Thread(target=self._process_requests)
+                thread.daemon = True
+                thread.start()
+
+    def process_request(self, request, client_address):
+        self.handled += 1
+        if self.max_requests and self.handled >= self.max_requests:
+            self.running = False
+        if self._requests is None:
+            BaseWSGIServer.process_request(self, request, client_address)
+        else:
+            self._requests.put((request, client_address))
+
+    def _process_requests(self):
+        while True:
+            request, client_address = self._requests.get()
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+                self._requests.task_done()
+
+    def stop(self, *args):
+        self.running = False
+
+    def serve_until_stopped(self):
+        while self.running:
+            try:
+                ready = select.select([self], [], [], self.POLL_INTERVAL)[0]
+            except select.error as e:
+                if e.args[0] != errno.EINTR:
+                    raise
+                continue
+            if ready:
+                self._handle_request_noblock()
+        if self._requests is not None:
+            self._requests.join()
+        self.server_close()
+
+
+class PreforkServer:
+
+    WORKERS = 4
+    THREADS = 1
+    MAX_REQUESTS = 0
+    MAX_REQUESTS_JITTER = 0
+    GRACEFUL_TIMEOUT = 30
+    BACKLOG = 128
+    POLL_INTERVAL = 0.5
+
+    def __init__(self, app, host='127.0.0.1', port=5000, workers=None,
+                 threads=None, max_requests=None, max_requests_jitter=None,
+                 graceful_timeout=None, reset_after_fork=None,
+                 worker_exit=None):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = self.WORKERS if workers is None else workers
+        self.threads = self.THREADS if threads is None else threads
+        self.max_requests = (self.MAX_REQUESTS if max_requests is None
+                             else max_requests)
+        self.max_requests_jitter = (self.MAX_REQUESTS_JITTER
+                                    if max_requests_jitter is None
+                                    else max_requests_jitter)
+        self.graceful_timeout = (self.GRACEFUL_TIMEOUT
+                                 if graceful_timeout is None
+                                 else graceful_timeout)
+        self.reset_after_fork = reset_after_fork
+        self.worker_exit = worker_exit
+        self.socket = None
+        self.running = False
+        self.generation = 0
+        self._workers = {}
+        self._stopping = set()
+
+    def listen(self):
+        family = select_ip_version(self.host, self.port)
+        self.socket = socket.socket(family, socket.SOCK_STREAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind((self.host, self.port))
+        self.socket.listen(self.BACKLOG)
+        self.port = self.socket.getsockname()[1]
+
+    def serve_forever(self):
+        if self.socket is None:
+            self.listen()
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGHUP, self.restart)
+        logging.info('prefork master %d listening on %s:%d', os.getpid(),
+                     self.host, self.port)
+        try:
+            while self.running:
+                self.reap_workers()
+                self.spawn_workers()
+                self.stop_old_workers()
+                time.sleep(self.POLL_INTERVAL)
+        finally:
+            self.stop_workers()
+            self.socket.close()
+
+    def stop(self, *args):
+        self.running = False
+
+    def restart(self, *args):
+        self.generation += 1
+
+    def spawn_workers(self):
+        generation = self.generation
+        current = sum(1 for worker_generation in self._workers.values()
+                      if worker_generation == generation)
+        if current < self.workers and self.reset_after_fork is not None:
+            self.reset_after_fork()
+        for i in xrange(self.workers - current):
+            pid = os.fork()
+            if pid == 0:
+                self.run_worker()
+            self._workers[pid] = generation
+
+    def run_worker(self):
+        status = 0
+        try:
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            signal.signal(signal.SIGHUP, signal.SIG_IGN)
+            if self.reset_after_fork is not None:
+                self.reset_after_fork()
+            random.seed()
+            max_requests = self.max_requests
+            if max_requests and self.max_requests_jitter:
+                max_requests += random.randint(0, self.max_requests_jitter)
+            server = PreforkWSGIServer(self.host, self.port, self.app,
+                                       self.socket.fileno(), self.threads,
+                                       max_requests)
+            signal.signal(signal.SIGTERM, server.stop)
+            server.serve_until_stopped()
+        except Exception:
+            logging.exception('prefork worker %d failed', os.getpid())
+            status = 1
+        finally:
+            if self.worker_exit is not None:
+                self.worker_exit()
+            os._exit(status)
+
+    def stop_old_workers(self):
+        for pid, generation in self._workers.items():
+            if generation != self.generation and pid not in self._stopping:
+                self._kill(pid, signal.SIGTERM)
+
+    def reap_workers(self):
+        while self._workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                if e.errno != errno.ECHILD:
+                    raise
+                self._workers.clear()
+                break
+            if pid == 0:
+                break
+            self._workers.pop(pid, None)
+            self._stopping.discard(pid)
+
+    def stop_workers(self):
+        for pid in self._workers.keys():
+            self._kill(pid, signal.SIGTERM)
+        deadline = time.time() + self.graceful_timeout
+        while self._workers and time.time() < deadline:
+            self.reap_workers()
+            time.sleep(0.05)
+        for pid in self._workers.keys():
+            self._kill(pid, signal.SIGKILL)
+        while self._workers:
+            self.reap_workers()
+            time.sleep(0.05)
+
+    def _kill(self, pid, signum):
+        self._stopping.add(pid)
+        try:
+            os.kill(pid, signum)
+        except OSError as e:
+            if e.errno != errno.ESRCH:
+                raise
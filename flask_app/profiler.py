@@ -0,0 +1,113 @@
+import cProfile
+import collections
+import datetime
+import hashlib
+import itertools
+import logging
+import os
+import pstats
+import random
+import re
+import time
+from flask import g, request
+
+
+ProfileRecord = collections.namedtuple(
+    'ProfileRecord', ['path', 'created', 'method', 'url', 'duration_ms'])
+
+
+class RequestProfiler:
+
+    ENABLED = False
+    DIRECTORY = 'profiles'
+    SAMPLE_RATE = 1.0
+    URL_PATTERN = None
+    HEADER = 'X-Profile'
+    MAX_URL_LENGTH = 100
+    CREATED_FORMAT = '%Y%m%d-%H%M%S'
+    FILENAME_RE = re.compile(
+        r'^(\d{8}-\d{6})-\d+-\d+\.([A-Z]+)\.(.*)\.(\d+)ms\.prof$')
+
+    def __init__(self, directory=None):
+        basedir = os.path.abspath(os.path.dirname(__file__))
+        self.directory = (os.path.join(basedir, self.DIRECTORY)
+                          if directory is None else directory)
+        self.enabled = self.ENABLED
+        self.sample_rate = self.SAMPLE_RATE
+        self.url_pattern = self.URL_PATTERN
+        self.header = self.HEADER
+        self._sequence = itertools.count()
+
+    def init_app(self, app):
+        self.enabled = app.config.get('PROFILE_ENABLED', self.enabled)
+        self.directory = app.config.get('PROFILE_DIR') or self.directory
+        self.sample_rate = app.config.get('PROFILE_SAMPLE_RATE',
+                                          self.sample_rate)
+        self.url_pattern = app.config.get('PROFILE_URL_PATTERN',
+                                          self.url_pattern)
+        self.header = app.config.get('PROFILE_HEADER', self.header)
+        app.before_request(self._start_request)
+        app.teardown_request(self._finish_request)
+
+    def should_profile(self):
+        if not self.enabled:
+            return False
+        if self.header and request.headers.get(self.header):
+            return True
+        if (self.url_pattern is not None and
+                re.search(self.url_pattern, request.path) is None):
+            return False
+        return random.random() < self.sample_rate
+
+    def _start_request(self):
+        if self.should_profile():
+            g.profile = cProfile.Profile()
+            g.profile_started = time.time()
+            g.profile.enable()
+
+    def _finish_request(self, ex=None):
+        profile = g.pop('profile', None)
+        if profile is None:
+            return
+        profile.disable()
+        duration = time.time() - g.pop('profile_started')
+        try:
+            profile.dump_stats(self.profile_path(request.method,
+                                                 request.path, duration))
+        except (IOError, OSError) as e:
+            logging.error(e)
+
+    def profile_path(self, method, url, duration):
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        url = '.'.join(re.sub(r'[^A-Za-z0-9_-]', '_', part)
+                       for part in url.strip('/').split('/'))
+        if len(url) > self.MAX_URL_LENGTH:
+            url = '{0}~{1}'.format(url[:self.MAX_URL_LENGTH],
+                                   hashlib.sha1(url).hexdigest()[:8])
+        filename = '{0}-{1}-{2}.{3}.{4}.{5}ms.prof'.format(
+            datetime.datetime.now().strftime(self.CREATED_FORMAT),
+            os.getpid(), next(self._sequence), method, url,
+            int(duration * 1000))
+        return os.path.join(self.directory, filename)
+
+    def list_profiles(self):
+        if not os.path.isdir(self.directory):
+            return []
+        records = []
+        for name in sorted(os.listdir(self.directory)):
+            match = self.FILENAME_RE.match(name)
+            if match is None:
+                continue
+            created = datetime.datetime.strptime(match.group(1),
+                                                 self.CREATED_FORMAT)
+            records.append(ProfileRecord(
+                os.path.join(self.directory, name), created, match.group(2),
+                '/' + match.group(3).replace('.', '/'),
+                int(match.group(4))))
+        return records
+
+
+def summarize_profiles(paths, stream, sort='cumulative', limit=20):
+    stats = pstats.Stats(*paths, stream=stream)
+    stats.sort_stats(sort).print_stats(limit)
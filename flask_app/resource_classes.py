@@ -1,30 +1,221 @@
-from flask import jsonify, abort, request, make_response
-from flask_httpauth import HTTPBasicAuth
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from flask import jsonify, abort, request, make_response, g, current_app
+from flask import has_app_context
+from flask import Response, stream_with_context, url_for
+from flask_httpauth import HTTPBasicAuth, HTTPTokenAuth, MultiAuth
 from flask_restful import Resource
-from geek_jokes_api import GeekJokesApi
-from logger import Logger
-from models import session, UserModel, JokeModel
+from models import database, session, search_table, text_digest
+from models import UserModel, JokeModel, insert_ignoring_duplicates
+from sqlalchemy import and_, case, event, literal_column, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm.exc import NoResultFound
+from werkzeug.local import LocalProxy
+from .metrics import metrics
 from .simple_authorizer import SimpleAuthorizer
 
 
-auth = HTTPBasicAuth()
-geek_jokes = GeekJokesApi()
-logger = Logger()
+JOKE_ROW_FORMAT = '{"id":%d,"text":%s,"user_id":%s}'
+
+basic_auth = HTTPBasicAuth()
+token_auth = HTTPTokenAuth('Bearer')
+auth = MultiAuth(basic_auth, token_auth)
 authorizer = SimpleAuthorizer()
 
 
-@auth.verify_password
+def app_component(name):
+    return LocalProxy(lambda: current_app.extensions[name])
+
+
+geek_jokes = app_component('geek_jokes')
+joke_pool = app_component('joke_pool')
+logger = app_component('logger')
+credential_cache = app_component('credential_cache')
+token_signer = app_component('token_signer')
+response_cache = app_component('response_cache')
+joke_filter = app_component('joke_filter')
+admission = app_component('admission')
+compressor = app_component('compression')
+profiler = app_component('profiler')
+
+
+@event.listens_for(UserModel.password_hash, 'set')
+def invalidate_credentials(user, value, old_value, initiator):
+    if user.username is not None and has_app_context():
+        credential_cache.invalidate(user.username)
+
+
+def current_username():
+    return g.get('username', '')
+
+
+def encode_joke_row(row):
+    joke_id, user_id, text = row
+    return JOKE_ROW_FORMAT % (joke_id, json.dumps(text), json.dumps(user_id))
+
+
+def get_int_arg(name):
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        abort(400, '{0} must be an integer'.format(name))
+
+
+def get_jokes_version(account_id):
+    user = g.get('user')
+    if user is not None:
+        return user.jokes_version
+    version = session.query(UserModel.jokes_version)
+    version = version.filter(UserModel.id_ == account_id).scalar()
+    if version is None:
+        abort(403, 'forbidden')
+    return version
+
+
+def bump_jokes_version(account_id, expected=None):
+    users = session.query(UserModel).filter(UserModel.id_ == account_id)
+    if expected is not None:
+        users = users.filter(UserModel.jokes_version == expected)
+    updated = users.update(
+        {UserModel.jokes_version: UserModel.jokes_version + 1},
+        synchronize_session=False)
+    if not updated:
+        session.rollback()
+        abort(412, 'jokes were changed by another request')
+    response_cache.invalidate(account_id)
+
+
+def jokes_etag(account_id, version):
+    key = u'{0}:{1}:{2}'.format(account_id, version, request.full_path)
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def not_modified(etag):
+    response = make_response('', 304)
+    response.set_etag(etag)
+    return response
+
+
+def check_if_match(account_id, version):
+    if request.if_match and not request.if_match.contains(
+            jokes_etag(account_id, version)):
+        abort(412, 'jokes were changed by another request')
+    return version if request.if_match else None
+
+
+def warm_joke_filter():
+    digests = session.query(JokeModel.text_digest)
+    digests = digests.filter(JokeModel.text_digest.isnot(None))
+    joke_filter.warm(digest for digest, in digests.yield_per(10000))
+    session.remove()
+
+
+def filter_new_texts(texts):
+    digests = OrderedDict()
+    for text in texts:
+        if text:
+            digests.setdefault(text_digest(text), text)
+    maybe_taken = [digest for digest in digests
+                   if joke_filter.might_contain(digest)]
+    if maybe_taken:
+        existing = session.query(JokeModel.text_digest)
+        existing = existing.filter(JokeModel.text_digest.in_(maybe_taken))
+        for digest, in existing:
+            del digests[digest]
+    return digests.values()
+
+
+def fetch_batches(statement, batch_size):
+    result = session.execute(
+        statement.execution_options(stream_results=True))
+    rows = result.fetchmany(batch_size)
+    while rows:
+        yield rows
+        rows = result.fetchmany(batch_size)
+
+
+def parse_import_line(line, line_number, imported):
+    try:
+        joke = json.loads(line)
+    except ValueError:
+        joke = None
+    text = joke.get('text') if isinstance(joke, dict) else None
+    if not isinstance(text, basestring) or not text.strip():
+        abort(400, 'line {0} must be a JSON object with a text, {1} jokes '
+              'were imported'.format(line_number, imported))
+    return text
+
+
+def search_terms(query):
+    return re.findall(r'\w+', query or '', re.UNICODE)
+
+
+def search_jokes(terms, account_id=None, max_candidates=None):
+    columns = [JokeModel.id_, JokeModel.user_id, JokeModel.text]
+    if not database.full_text_search:
+        jokes = select(columns).where(and_(*[
+            JokeModel.text.ilike(u'%{0}%'.format(term)) for term in terms]))
+        if account_id is not None:
+            jokes = jokes.where(JokeModel.user_id == account_id)
+        return jokes.order_by(JokeModel.id_)
+    match = ' '.join(u'"{0}"'.format(term) for term in terms)
+    candidates = select([search_table.c.rowid, search_table.c.rank])
+    candidates = candidates.where(
+        literal_column(search_table.name).match(match))
+    if account_id is not None:
+        candidates = candidates.select_from(search_table.join(
+            JokeModel.__table__, JokeModel.id_ == search_table.c.rowid))
+        candidates = candidates.where(JokeModel.user_id == account_id)
+    elif max_candidates:
+        candidates = candidates.order_by(search_table.c.rowid.desc())
+        candidates = candidates.limit(max_candidates)
+    candidates = candidates.alias('candidates')
+    jokes = select(columns).select_from(candidates.join(
+        JokeModel.__table__, JokeModel.id_ == candidates.c.rowid))
+    return jokes.order_by(candidates.c.rank, JokeModel.id_)
+
+
+@basic_auth.verify_password
 def verify_pw(username, password):
     try:
         user = session.query(UserModel)
         user = user.filter(UserModel.username == username).one()
-        return user.check_password(password)
+        verified = credential_cache.check(username, user.password_hash,
+                                          password)
+        if not verified:
+            started = time.time()
+            verified = user.check_password(password)
+            metrics.password_hash_latency.observe(time.time() - started)
+            if verified:
+                credential_cache.add(username, user.password_hash, password)
+        if verified:
+            g.user = user
+            g.username = user.username
+            g.user_id = user.id_
+            admission.throttle(g.user_id)
+            return True
     except NoResultFound as e:
         pass
     return False
 
 
+@token_auth.verify_token
+def verify_token(token):
+    data = token_signer.loads(token) if token else None
+    if data is None:
+        return False
+    g.username = data['username']
+    g.user_id = data['id']
+    admission.throttle(g.user_id)
+    return True
+
+
 class Users(Resource):
 
     def post(self):
@@ -40,7 +231,9 @@ class Users(Resource):
         if user is not None:
             abort(409, 'user already exists')
         new_user = UserModel(username=username)
+        started = time.time()
         new_user.hash_password(password)
+        metrics.password_hash_latency.observe(time.time() - started)
         session.add(new_user)
         session.commit()
         logger.log(new_user.username, request.date, request.remote_addr,
@@ -48,51 +241,320 @@ class Users(Resource):
         return make_response(jsonify(user=new_user.serialize), 201)
 
 
+class Tokens(Resource):
+
+    @basic_auth.login_required
+    def post(self):
+        logger.log(current_username(), request.date, request.remote_addr,
+                   request.url)
+        token = token_signer.dumps(g.user_id, g.username)
+        return make_response(jsonify(token=token,
+                                     expires_in=token_signer.expires_in), 201)
+
+
 class User(Resource):
 
     @auth.login_required
     def get(self, account_id):
-        logger.log(auth.username(), request.date, request.remote_addr,
+        logger.log(current_username(), request.date, request.remote_addr,
                    request.url)
-        authorized_user = authorizer.authorize_user(auth.username(),
-                                                    account_id)
-        return jsonify(user=authorized_user.serialize)
+        authorizer.authorize_user(g.user_id, account_id)
+        user = g.get('user')
+        if user is None:
+            user = session.query(UserModel).get(account_id)
+            if user is None:
+                abort(403, 'forbidden')
+        response = jsonify(user=user.serialize)
+        response.add_etag()
+        return response.make_conditional(request)
 
 
 class Jokes(Resource):
 
     POST_GENERATION_RETRY_TIMES = 10
+    POST_CONFLICT_RETRY_TIMES = 3
+    POST_FETCH_WIDTH = 1
+    PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 500
+    STREAM_BATCH_SIZE = 100
+    MAX_BULK_COUNT = 100
+
+    def find_new_joke_texts(self, count, candidates=()):
+        width = current_app.config.get('JOKES_POST_FETCH_WIDTH',
+                                       self.POST_FETCH_WIDTH)
+        texts = filter_new_texts(candidates)[:count]
+        for i in xrange(self.POST_GENERATION_RETRY_TIMES):
+            if len(texts) == count:
+                break
+            wanted = max(width, count - len(texts))
+            if wanted > 1:
+                candidates = joke_pool.get_jokes(wanted)
+            else:
+                candidates = [joke_pool.get_a_joke()]
+            if not any(candidates):
+                break
+            taken = set(text_digest(text) for text in texts)
+            new_texts = [text for text in filter_new_texts(candidates)
+                         if text_digest(text) not in taken]
+            joke_pool.put_back(new_texts[count - len(texts):])
+            texts.extend(new_texts[:count - len(texts)])
+        return texts
 
     @auth.login_required
     def get(self, account_id):
-        logger.log(auth.username(), request.date, request.remote_addr,
+        logger.log(current_username(), request.date, request.remote_addr,
                    request.url)
-        authorizer.authorize_user(auth.username(), account_id)
-        jokes = session.query(JokeModel)
-        jokes = jokes.join(UserModel, JokeModel.user_id == UserModel.id_)
-        jokes = jokes.filter(JokeModel.user_id == account_id).all()
-        return jsonify(jokes=[j.serialize for j in jokes])
+        authorizer.authorize_user(g.user_id, account_id)
+        version = get_jokes_version(account_id)
+        etag = jokes_etag(account_id, version)
+        if request.if_none_match.contains(etag):
+            return not_modified(etag)
+        cache_key = u'{0}:{1}'.format(version, request.full_path)
+        cached = response_cache.get(account_id, cache_key)
+        if cached is not None:
+            body, headers = cached
+            response = current_app.response_class(
+                body, headers=list(headers), mimetype='application/json')
+        else:
+            response = self.list_jokes(account_id)
+            if not response.is_streamed:
+                headers = [(name, value) for name, value in response.headers
+                           if name == 'Link']
+                response_cache.set(account_id, cache_key,
+                                   response.get_data(), headers)
+        response.set_etag(etag)
+        return response
+
+    def list_jokes(self, account_id):
+        jokes = select([JokeModel.id_, JokeModel.user_id, JokeModel.text])
+        jokes = jokes.where(JokeModel.user_id == account_id)
+        limit = get_int_arg('limit')
+        after = get_int_arg('after')
+        if after is not None:
+            jokes = jokes.where(JokeModel.id_ > after)
+        jokes = jokes.order_by(JokeModel.id_)
+        if request.args.get('stream'):
+            return self.stream_jokes(jokes, limit)
+        if limit is None and after is None:
+            body = '{{"jokes":[{0}]}}\n'.format(
+                ','.join(encode_joke_row(row)
+                         for row in session.execute(jokes)))
+            return current_app.response_class(body,
+                                              mimetype='application/json')
+        return self.get_page(jokes, account_id, limit)
+
+    def get_page(self, jokes, account_id, limit):
+        config = current_app.config
+        if limit is None:
+            limit = config.get('JOKES_PAGE_SIZE', self.PAGE_SIZE)
+        if limit <= 0:
+            abort(400, 'limit must be positive')
+        limit = min(limit, config.get('JOKES_MAX_PAGE_SIZE',
+                                      self.MAX_PAGE_SIZE))
+        rows = session.execute(jokes.limit(limit + 1)).fetchall()
+        next_url = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_url = url_for('jokes', account_id=account_id, limit=limit,
+                               after=rows[-1][0], _external=True)
+        body = '{{"jokes":[{0}],"next":{1}}}\n'.format(
+            ','.join(encode_joke_row(row) for row in rows),
+            json.dumps(next_url))
+        response = current_app.response_class(body,
+                                              mimetype='application/json')
+        if next_url is not None:
+            response.headers['Link'] = '<{0}>; rel="next"'.format(next_url)
+        return response
+
+    def stream_jokes(self, jokes, limit):
+        if limit is not None:
+            if limit <= 0:
+                abort(400, 'limit must be positive')
+            jokes = jokes.limit(limit)
+        batch_size = current_app.config.get('JOKES_STREAM_BATCH_SIZE',
+                                            self.STREAM_BATCH_SIZE)
+
+        def generate():
+            yield '{"jokes":['
+            separator = ''
+            for rows in fetch_batches(jokes, batch_size):
+                yield separator + ','.join(encode_joke_row(row)
+                                           for row in rows)
+                separator = ','
+            yield ']}\n'
+        return Response(stream_with_context(generate()),
+                        mimetype='application/json')
 
     @auth.login_required
     def post(self, account_id):
-        logger.log(auth.username(), request.date, request.remote_addr,
+        logger.log(current_username(), request.date, request.remote_addr,
                    request.url)
-        authorizer.authorize_user(auth.username(), account_id)
-        joke_cnt = None
-        for i in xrange(self.POST_GENERATION_RETRY_TIMES):
-            new_joke_text = geek_jokes.get_a_joke()
-            if not new_joke_text:
+        authorizer.authorize_user(g.user_id, account_id)
+        count = get_int_arg('count')
+        if count is not None:
+            return self.post_many(account_id, count)
+        for i in xrange(self.POST_CONFLICT_RETRY_TIMES):
+            new_joke_texts = self.find_new_joke_texts(1)
+            if not new_joke_texts:
+                abort(500)
+            new_joke = JokeModel(text=new_joke_texts[0], user_id=account_id)
+            digest = new_joke.text_digest
+            session.add(new_joke)
+            try:
+                bump_jokes_version(account_id)
+                session.commit()
+            except IntegrityError:
+                session.rollback()
+                joke_filter.add(digest)
+                continue
+            joke_filter.add(digest)
+            return make_response(jsonify(joke=new_joke.serialize), 201)
+        abort(409, 'joke already exists')
+
+    def post_many(self, account_id, count):
+        self.check_bulk_count(count)
+        new_joke_texts = []
+        for i in xrange(self.POST_CONFLICT_RETRY_TIMES):
+            new_joke_texts = self.find_new_joke_texts(count, new_joke_texts)
+            if not new_joke_texts:
                 abort(500)
-            joke_cnt = session.query(JokeModel)
-            joke_cnt = joke_cnt.filter(JokeModel.text == new_joke_text).count()
-            if joke_cnt == 0:
+            digests = [text_digest(text) for text in new_joke_texts]
+            try:
+                session.execute(JokeModel.__table__.insert(),
+                                [{'user_id': account_id, 'text': text,
+                                  'text_digest': digest}
+                                 for text, digest in zip(new_joke_texts,
+                                                         digests)])
+                bump_jokes_version(account_id)
+                session.commit()
+                committed = True
+            except IntegrityError:
+                session.rollback()
+                committed = False
+            for digest in digests:
+                joke_filter.add(digest)
+            if committed:
                 break
         else:
-            abort(500)
-        new_joke = JokeModel(text=new_joke_text, user_id=account_id)
-        session.add(new_joke)
-        session.commit()
-        return make_response(jsonify(joke=new_joke.serialize), 201)
+            abort(409, 'joke already exists')
+        new_jokes = session.query(JokeModel)
+        new_jokes = new_jokes.filter(JokeModel.text_digest.in_(digests))
+        new_jokes = new_jokes.order_by(JokeModel.id_).all()
+        return make_response(jsonify(jokes=[j.serialize for j in new_jokes]),
+                             201)
+
+    def check_bulk_count(self, count):
+        max_count = current_app.config.get('JOKES_MAX_BULK_COUNT',
+                                           self.MAX_BULK_COUNT)
+        if count <= 0 or count > max_count:
+            abort(400, 'count must be between 1 and {0}'.format(max_count))
+
+    @auth.login_required
+    def patch(self, account_id):
+        logger.log(current_username(), request.date, request.remote_addr,
+                   request.url)
+        authorizer.authorize_user(g.user_id, account_id)
+        content = request.get_json(silent=True)
+        updates = content.get('jokes') if isinstance(content, dict) else None
+        if not isinstance(updates, list):
+            abort(400, 'jokes list is required')
+        self.check_bulk_count(len(updates))
+        new_texts = OrderedDict()
+        for update in updates:
+            if (not isinstance(update, dict) or
+                    not isinstance(update.get('id'), int) or
+                    not isinstance(update.get('text'), basestring) or
+                    not update['text']):
+                abort(400, 'every joke needs an id and a text')
+            if update['id'] in new_texts:
+                abort(400, 'duplicate joke id')
+            new_texts[update['id']] = update['text']
+        new_digests = dict((joke_id, text_digest(text))
+                           for joke_id, text in new_texts.items())
+        if len(set(new_digests.values())) != len(new_digests):
+            abort(400, 'duplicate joke text')
+        owned = session.query(JokeModel.id_)
+        owned = owned.filter(JokeModel.user_id == account_id,
+                             JokeModel.id_.in_(new_texts.keys()))
+        owned = set(joke_id for joke_id, in owned)
+        taken = session.query(JokeModel.id_, JokeModel.text_digest)
+        taken = taken.filter(
+            JokeModel.text_digest.in_(new_digests.values()))
+        taken = dict((digest, joke_id) for joke_id, digest in taken)
+        conflicts = set(joke_id for joke_id, digest in new_digests.items()
+                        if taken.get(digest, joke_id) != joke_id)
+        updated = dict((joke_id, text) for joke_id, text in new_texts.items()
+                       if joke_id in owned and joke_id not in conflicts)
+        if updated:
+            jokes = session.query(JokeModel)
+            jokes = jokes.filter(JokeModel.user_id == account_id,
+                                 JokeModel.id_.in_(updated.keys()))
+            updated_digests = dict((joke_id, new_digests[joke_id])
+                                   for joke_id in updated)
+            try:
+                jokes.update({JokeModel.text: case(updated,
+                                                   value=JokeModel.id_),
+                              JokeModel.text_digest: case(
+                                  updated_digests, value=JokeModel.id_)},
+                             synchronize_session=False)
+                bump_jokes_version(account_id)
+                session.commit()
+            except IntegrityError:
+                session.rollback()
+                abort(409, 'joke already exists')
+            for digest in updated_digests.values():
+                joke_filter.add(digest)
+        results = []
+        for joke_id in new_texts:
+            if joke_id in updated:
+                status = 200
+            elif joke_id in owned:
+                status = 409
+            else:
+                status = 404
+            results.append({'id': joke_id, 'status': status})
+        return jsonify(results=results)
+
+    @auth.login_required
+    def delete(self, account_id):
+        logger.log(current_username(), request.date, request.remote_addr,
+                   request.url)
+        authorizer.authorize_user(g.user_id, account_id)
+        content = request.get_json(silent=True)
+        if not isinstance(content, dict):
+            abort(400, 'ids or text_contains is required')
+        joke_ids = content.get('ids')
+        text_contains = content.get('text_contains')
+        if joke_ids is None and not text_contains:
+            abort(400, 'ids or text_contains is required')
+        if (text_contains is not None and
+                not isinstance(text_contains, basestring)):
+            abort(400, 'text_contains must be a string')
+        criteria = [JokeModel.user_id == account_id]
+        if joke_ids is not None:
+            if (not isinstance(joke_ids, list) or
+                    not all(isinstance(i, int) for i in joke_ids)):
+                abort(400, 'ids must be a list of integers')
+            self.check_bulk_count(len(joke_ids))
+            criteria.append(JokeModel.id_.in_(joke_ids))
+        if text_contains:
+            criteria.append(JokeModel.text.contains(text_contains,
+                                                    autoescape=True))
+        deleted = session.query(JokeModel.id_).filter(*criteria)
+        deleted = [joke_id for joke_id, in deleted]
+        if deleted:
+            jokes = session.query(JokeModel).filter(*criteria)
+            jokes.delete(synchronize_session=False)
+            bump_jokes_version(account_id)
+            session.commit()
+        if joke_ids is None:
+            results = [{'id': joke_id, 'status': 200} for joke_id in deleted]
+        else:
+            deleted = set(deleted)
+            results = [{'id': joke_id,
+                        'status': 200 if joke_id in deleted else 404}
+                       for joke_id in OrderedDict.fromkeys(joke_ids)]
+        return jsonify(results=results)
 
 
 class Joke(Resource):
@@ -109,31 +571,172 @@ class Joke(Resource):
 
     @auth.login_required
     def get(self, account_id, joke_id):
-        logger.log(auth.username(), request.date, request.remote_addr,
+        logger.log(current_username(), request.date, request.remote_addr,
                    request.url)
-        authorizer.authorize_user(auth.username(), account_id)
+        authorizer.authorize_user(g.user_id, account_id)
+        etag = jokes_etag(account_id, get_jokes_version(account_id))
+        if request.if_none_match.contains(etag):
+            return not_modified(etag)
         joke = self.get_joke_or_404(joke_id, account_id)
-        return jsonify(joke=joke.serialize)
+        response = jsonify(joke=joke.serialize)
+        response.set_etag(etag)
+        return response
 
     @auth.login_required
     def put(self, account_id, joke_id):
-        logger.log(auth.username(), request.date, request.remote_addr,
+        logger.log(current_username(), request.date, request.remote_addr,
                    request.url)
-        authorizer.authorize_user(auth.username(), account_id)
+        authorizer.authorize_user(g.user_id, account_id)
         json_obj = request.json
-        if 'text' not in json_obj or not json_obj['text']:
+        if ('text' not in json_obj or
+                not isinstance(json_obj['text'], basestring) or
+                not json_obj['text']):
             abort(400)
+        version = get_jokes_version(account_id)
+        expected = check_if_match(account_id, version)
         joke = self.get_joke_or_404(joke_id, account_id)
         joke.text = json_obj['text']
+        digest = joke.text_digest
         session.add(joke)
-        session.commit()
+        try:
+            bump_jokes_version(account_id, expected)
+            session.commit()
+        except IntegrityError:
+            session.rollback()
+            abort(409, 'joke already exists')
+        joke_filter.add(digest)
+        return None, 200, {'ETag': '"{0}"'.format(jokes_etag(account_id,
+                                                            version + 1))}
 
     @auth.login_required
     def delete(self, account_id, joke_id):
-        logger.log(auth.username(), request.date, request.remote_addr,
+        logger.log(current_username(), request.date, request.remote_addr,
                    request.url)
-        authorizer.authorize_user(auth.username(), account_id)
+        authorizer.authorize_user(g.user_id, account_id)
+        version = get_jokes_version(account_id)
+        expected = check_if_match(account_id, version)
         joke = self.get_joke_or_404(joke_id, account_id)
         session.delete(joke)
+        bump_jokes_version(account_id, expected)
         session.commit()
+        return None, 200, {'ETag': '"{0}"'.format(jokes_etag(account_id,
+                                                            version + 1))}
 
+
+class JokeSearch(Resource):
+
+    PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 500
+    MAX_CANDIDATES = 2000
+
+    @auth.login_required
+    def get(self, account_id=None):
+        logger.log(current_username(), request.date, request.remote_addr,
+                   request.url)
+        etag = None
+        if account_id is not None:
+            authorizer.authorize_user(g.user_id, account_id)
+            etag = jokes_etag(account_id, get_jokes_version(account_id))
+            if request.if_none_match.contains(etag):
+                return not_modified(etag)
+        query = request.args.get('q')
+        terms = search_terms(query)
+        if not terms:
+            abort(400, 'q must contain at least one word')
+        config = current_app.config
+        limit = get_int_arg('limit')
+        if limit is None:
+            limit = config.get('JOKES_PAGE_SIZE', self.PAGE_SIZE)
+        offset = get_int_arg('offset') or 0
+        if limit <= 0 or offset < 0:
+            abort(400, 'limit must be positive and offset not negative')
+        limit = min(limit, config.get('JOKES_MAX_PAGE_SIZE',
+                                      self.MAX_PAGE_SIZE))
+        jokes = search_jokes(terms, account_id,
+                             config.get('JOKES_SEARCH_MAX_CANDIDATES',
+                                        self.MAX_CANDIDATES))
+        rows = session.execute(jokes.limit(limit + 1).offset(offset))
+        rows = rows.fetchall()
+        next_url = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_url = url_for('jokesearch', account_id=account_id, q=query,
+                               limit=limit, offset=offset + limit,
+                               _external=True)
+        body = '{{"jokes":[{0}],"next":{1}}}\n'.format(
+            ','.join(encode_joke_row(row) for row in rows),
+            json.dumps(next_url))
+        response = current_app.response_class(body,
+                                              mimetype='application/json')
+        if next_url is not None:
+            response.headers['Link'] = '<{0}>; rel="next"'.format(next_url)
+        if etag is not None:
+            response.set_etag(etag)
+        return response
+
+
+class JokesExport(Resource):
+
+    STREAM_BATCH_SIZE = 100
+
+    @auth.login_required
+    def get(self, account_id):
+        logger.log(current_username(), request.date, request.remote_addr,
+                   request.url)
+        authorizer.authorize_user(g.user_id, account_id)
+        jokes = select([JokeModel.id_, JokeModel.user_id, JokeModel.text])
+        jokes = jokes.where(JokeModel.user_id == account_id)
+        jokes = jokes.order_by(JokeModel.id_)
+        batch_size = current_app.config.get('JOKES_STREAM_BATCH_SIZE',
+                                            self.STREAM_BATCH_SIZE)
+
+        def generate():
+            for rows in fetch_batches(jokes, batch_size):
+                yield ''.join(encode_joke_row(row) + '\n' for row in rows)
+        return Response(stream_with_context(generate()),
+                        mimetype='application/x-ndjson')
+
+
+class JokesImport(Resource):
+
+    CHUNK_SIZE = 500
+
+    @auth.login_required
+    def post(self, account_id):
+        logger.log(current_username(), request.date, request.remote_addr,
+                   request.url)
+        authorizer.authorize_user(g.user_id, account_id)
+        chunk_size = current_app.config.get('JOKES_IMPORT_CHUNK_SIZE',
+                                            self.CHUNK_SIZE)
+        insert = insert_ignoring_duplicates(JokeModel.__table__,
+                                            database.engine)
+        imported = 0
+        total = 0
+        chunk = []
+        for line_number, line in enumerate(request.stream, 1):
+            if not line.strip():
+                continue
+            text = parse_import_line(line, line_number, imported)
+            chunk.append({'user_id': account_id, 'text': text,
+                          'text_digest': text_digest(text)})
+            if len(chunk) >= chunk_size:
+                imported += self.import_chunk(insert, account_id, chunk)
+                total += len(chunk)
+                chunk = []
+        if chunk:
+            imported += self.import_chunk(insert, account_id, chunk)
+            total += len(chunk)
+        return jsonify(imported=imported, skipped=total - imported)
+
+    def import_chunk(self, insert, account_id, chunk):
+        try:
+            inserted = session.execute(insert, chunk).rowcount
+            if inserted:
+                bump_jokes_version(account_id)
+            session.commit()
+        except IntegrityError:
+            session.rollback()
+            abort(409, 'joke already exists')
+        for joke in chunk:
+            joke_filter.add(joke['text_digest'])
+        return inserted
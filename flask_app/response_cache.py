@@ -0,0 +1,152 @@
+import threading
+from collections import OrderedDict
+
+
+class CacheBackend:
+
+    def get(self, account_id, key):
+        raise NotImplementedError
+
+    def set(self, account_id, key, value):
+        raise NotImplementedError
+
+    def invalidate(self, account_id):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    @property
+    def stats(self):
+        return {}
+
+
+class LRUCacheBackend(CacheBackend):
+
+    MAX_BYTES = 16 * 1024 * 1024
+    ENTRY_OVERHEAD = 200
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = self.MAX_BYTES if max_bytes is None else max_bytes
+        self._entries = OrderedDict()
+        self._keys = {}
+        self._lock = threading.Lock()
+        self.size = 0
+        self.evictions = 0
+
+    def _entry_size(self, value):
+        body, headers = value
+        return (len(body) + self.ENTRY_OVERHEAD +
+                sum(len(k) + len(v) for k, v in headers))
+
+    def _remove(self, entry_key):
+        value = self._entries.pop(entry_key)
+        self.size -= self._entry_size(value)
+        account_keys = self._keys[entry_key[0]]
+        account_keys.discard(entry_key)
+        if not account_keys:
+            del self._keys[entry_key[0]]
+
+    def get(self, account_id, key):
+        entry_key = (account_id, key)
+        with self._lock:
+            value = self._entries.pop(entry_key, None)
+            if value is not None:
+                self._entries[entry_key] = value
+            return value
+
+    def set(self, account_id, key, value):
+        entry_key = (account_id, key)
+        size = self._entry_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if entry_key in self._entries:
+                self._remove(entry_key)
+            self._entries[entry_key] = value
+            self._keys.setdefault(account_id, set()).add(entry_key)
+            self.size += size
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, account_id):
+        with self._lock:
+            for entry_key in list(self._keys.get(account_id, ())):
+                self._remove(entry_key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys.clear()
+            self.size = 0
+            self.evictions = 0
+
+    @property
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'size_bytes': self.size,
+                'max_bytes': self.max_bytes,
+                'evictions': self.evictions
+            }
+
+
+class ResponseCache:
+
+    ENABLED = True
+
+    def __init__(self, backend=None):
+        self.backend = LRUCacheBackend() if backend is None else backend
+        self.enabled = self.ENABLED
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        self.enabled = app.config.get('RESPONSE_CACHE_ENABLED', self.enabled)
+        backend = app.config.get('RESPONSE_CACHE_BACKEND')
+        if backend is None:
+            backend = LRUCacheBackend(
+                app.config.get('RESPONSE_CACHE_MAX_BYTES',
+                               LRUCacheBackend.MAX_BYTES))
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, account_id, key):
+        if not self.enabled:
+            return None
+        value = self.backend.get(account_id, key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, account_id, key, body, headers=()):
+        if self.enabled:
+            self.backend.set(account_id, key, (body, tuple(headers)))
+
+    def invalidate(self, account_id):
+        self.backend.invalidate(account_id)
+
+    def clear(self):
+        self.backend.clear()
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': float(self.hits) / lookups if lookups else 0.0
+            }
+        stats.update(self.backend.stats)
+        return stats
@@ -1,17 +1,8 @@
 from flask import abort
-from models import session, UserModel
-from sqlalchemy.orm.exc import NoResultFound
 
 
 class SimpleAuthorizer:
 
-    def authorize_user(self, auth_username, url_user_id):
-        try:
-            this_user = session.query(UserModel)
-            this_user = this_user.filter(UserModel.id_ == url_user_id).one()
-            if this_user.username != auth_username:
-                abort(403, 'forbidden')
-            return this_user
-        except NoResultFound:
+    def authorize_user(self, auth_user_id, url_user_id):
+        if auth_user_id is None or auth_user_id != url_user_id:
             abort(403, 'forbidden')
-
@@ -0,0 +1,32 @@
+from itsdangerous import BadSignature
+from itsdangerous import TimedJSONWebSignatureSerializer as Serializer
+
+
+class TokenSigner:
+
+    EXPIRES_IN = 3600
+    SALT = 'auth-token'
+
+    def __init__(self, expires_in=None):
+        self.expires_in = (self.EXPIRES_IN if expires_in is None
+                           else expires_in)
+        self.serializer = None
+
+    def init_app(self, app):
+        self.expires_in = app.config.get('TOKEN_EXPIRES_IN', self.expires_in)
+        self.serializer = Serializer(app.config['SECRET_KEY'],
+                                     expires_in=self.expires_in,
+                                     salt=self.SALT)
+
+    def dumps(self, user_id, username):
+        token = self.serializer.dumps({'id': user_id, 'username': username})
+        return token.decode('ascii')
+
+    def loads(self, token):
+        try:
+            data = self.serializer.loads(token)
+        except BadSignature:
+            return None
+        if 'id' not in data or 'username' not in data:
+            return None
+        return data
@@ -1,19 +1,132 @@
+import argparse
+import logging
+import shutil
 import sys
+import tempfile
 import unittest
-from flask_app import app
+from flask_app import create_app
+from flask_app.logger import parse_date, query_log
+from flask_app.prefork import PreforkServer
+from flask_app.profiler import summarize_profiles
 
 
 RUN_SERVER_COMMAND = 'runserver'
 RUN_TESTS_COMMAND = 'runtests'
+QUERY_LOG_COMMAND = 'querylog'
+PROFILES_COMMAND = 'profiles'
+RUN_PREFORK_COMMAND = 'runprefork'
 
+app = create_app()
+logger = app.extensions['logger']
+metrics = app.extensions['metrics']
+profiler = app.extensions['profiler']
 
-if len(sys.argv) == 2:
+
+def date_argument(text):
+    date = parse_date(text)
+    if date is None:
+        raise argparse.ArgumentTypeError('wrong date: {0}'.format(text))
+    return date
+
+
+def run_query_log(args):
+    parser = argparse.ArgumentParser(prog='options.py ' + QUERY_LOG_COMMAND)
+    parser.add_argument('--user', help='exact username')
+    parser.add_argument('--since', type=date_argument,
+                        help='YYYY-MM-DD[ HH:MM:SS]')
+    parser.add_argument('--until', type=date_argument,
+                        help='YYYY-MM-DD[ HH:MM:SS]')
+    parser.add_argument('--url', help='part of the requested url')
+    args = parser.parse_args(args)
+    logger.flush()
+    for record in query_log(logger, args.user, args.since, args.until,
+                            args.url):
+        sys.stdout.write(record.line)
+
+
+def run_profiles(args):
+    parser = argparse.ArgumentParser(prog='options.py ' + PROFILES_COMMAND)
+    parser.add_argument('--dir', help='profiles directory')
+    parser.add_argument('--url', help='part of the profiled url')
+    parser.add_argument('--method', help='exact http method')
+    parser.add_argument('--summary', action='store_true',
+                        help='print aggregated stats of matching profiles')
+    parser.add_argument('--sort', default='cumulative',
+                        help='pstats sort key')
+    parser.add_argument('--limit', type=int, default=20,
+                        help='number of functions in the summary')
+    args = parser.parse_args(args)
+    if args.dir:
+        profiler.directory = args.dir
+    records = [record for record in profiler.list_profiles()
+               if (args.url is None or args.url in record.url) and
+               (args.method is None or args.method == record.method)]
+    if args.summary:
+        if records:
+            summarize_profiles([record.path for record in records],
+                               sys.stdout, args.sort, args.limit)
+        return
+    for record in records:
+        sys.stdout.write('{0}\t{1:>7}\t{2:>6}ms\t{3}\n'.format(
+            record.created, record.method, record.duration_ms, record.url))
+
+
+def close_worker():
+    logger.close()
+    metrics.write_snapshot()
+
+
+def run_prefork(args):
+    parser = argparse.ArgumentParser(prog='options.py ' + RUN_PREFORK_COMMAND)
+    parser.add_argument('--host', default=app.config['SERVER_HOST'])
+    parser.add_argument('--port', type=int,
+                        default=app.config['SERVER_PORT'])
+    parser.add_argument('--workers', type=int,
+                        default=app.config['SERVER_WORKERS'],
+                        help='number of worker processes')
+    parser.add_argument('--threads', type=int,
+                        default=app.config['SERVER_THREADS'],
+                        help='request threads per worker')
+    parser.add_argument('--max-requests', type=int,
+                        default=app.config['SERVER_MAX_REQUESTS'],
+                        help='recycle a worker after this many requests')
+    parser.add_argument('--max-requests-jitter', type=int,
+                        default=app.config['SERVER_MAX_REQUESTS_JITTER'])
+    parser.add_argument('--graceful-timeout', type=float,
+                        default=app.config['SERVER_GRACEFUL_TIMEOUT'],
+                        help='seconds to wait for workers to finish')
+    args = parser.parse_args(args)
+    logging.basicConfig(level=logging.INFO)
+    print('running the prefork server, send SIGHUP to restart workers')
+    metrics_dir = None
+    if metrics.directory is None:
+        metrics.directory = metrics_dir = tempfile.mkdtemp(
+            prefix='jokes-api-metrics-')
+    metrics.clear_snapshots()
+    server = PreforkServer(app, args.host, args.port, args.workers,
+                           args.threads, args.max_requests,
+                           args.max_requests_jitter, args.graceful_timeout,
+                           app.extensions['database'].reset_after_fork,
+                           close_worker)
+    try:
+        server.serve_forever()
+    finally:
+        if metrics_dir is not None:
+            shutil.rmtree(metrics_dir)
+
+
+if len(sys.argv) >= 2:
     command = sys.argv[1]
-    if command == RUN_SERVER_COMMAND:
+    if command == RUN_SERVER_COMMAND and len(sys.argv) == 2:
         print('running the server')
         app.run()
-    if command == RUN_TESTS_COMMAND:
+    if command == RUN_TESTS_COMMAND and len(sys.argv) == 2:
         print('running tests')
         tests = unittest.TestLoader().discover('tests')
         unittest.TextTestRunner(verbosity=2).run(tests)
-
+    if command == QUERY_LOG_COMMAND:
+        run_query_log(sys.argv[2:])
+    if command == PROFILES_COMMAND:
+        run_profiles(sys.argv[2:])
+    if command == RUN_PREFORK_COMMAND:
+        run_prefork(sys.argv[2:])
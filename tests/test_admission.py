@@ -0,0 +1,127 @@
+import base64
+import threading
+import unittest
+from flask_app import create_app
+from flask_app.admission import ConcurrencyLimiter, TokenBuckets
+from flask_app.models import UserModel, JokeModel, session
+
+
+app = create_app()
+metrics = app.extensions['metrics']
+admission = app.extensions['admission']
+response_cache = app.extensions['response_cache']
+
+
+class ConcurrencyLimiterTestCase(unittest.TestCase):
+
+    def test_limit_reached_no_queue__rejected(self):
+        limiter = ConcurrencyLimiter(1)
+        self.assertTrue(limiter.acquire())
+        self.assertFalse(limiter.acquire())
+        self.assertEqual(limiter.stats['rejected_queue_full'], 1)
+        limiter.release()
+        self.assertTrue(limiter.acquire())
+
+    def test_queued_too_long__rejected(self):
+        limiter = ConcurrencyLimiter(1, queue_size=1, queue_timeout=0.05)
+        limiter.acquire()
+        self.assertFalse(limiter.acquire())
+        self.assertEqual(limiter.stats['rejected_timeout'], 1)
+        self.assertEqual(limiter.stats['waiting'], 0)
+
+    def test_queued_until_release__admitted(self):
+        limiter = ConcurrencyLimiter(1, queue_size=1, queue_timeout=5)
+        limiter.acquire()
+        results = []
+        waiter = threading.Thread(
+            target=lambda: results.append(limiter.acquire()))
+        waiter.start()
+        limiter.release()
+        waiter.join()
+        self.assertEqual(results, [True])
+        self.assertEqual(limiter.stats['active'], 1)
+
+
+class TokenBucketsTestCase(unittest.TestCase):
+
+    def test_burst_spent__wait_returned(self):
+        buckets = TokenBuckets(rate=1, burst=2, max_keys=10)
+        self.assertEqual(buckets.take(1), 0)
+        self.assertEqual(buckets.take(1), 0)
+        self.assertGreater(buckets.take(1), 0)
+        self.assertEqual(buckets.take(2), 0)
+        self.assertEqual(buckets.stats['rejected'], 1)
+
+    def test_max_keys__oldest_account_dropped(self):
+        buckets = TokenBuckets(rate=1, burst=1, max_keys=2)
+        for account_id in (1, 2, 3):
+            buckets.take(account_id)
+        self.assertEqual(buckets.stats['accounts'], 2)
+        self.assertEqual(buckets.take(1), 0)
+
+
+class AdmissionEndpointTestCase(unittest.TestCase):
+
+    TEST_USERS_ENDPOINT = 'v1/users'
+    TEST_USER_ENDPOINT = 'v1/users/{0}'
+    TEST_USER = {'username': 'Dino', 'password': 'Tirex'}
+
+    def setUp(self):
+        self.client = app.test_client()
+
+    def tearDown(self):
+        admission.configure(app.config['ADMISSION_LIMITS'])
+        with app.app_context():
+            session.query(JokeModel).delete()
+            session.query(UserModel).delete()
+            session.commit()
+        response_cache.clear()
+
+    def get_basic_auth_headers(self):
+        return {'Authorization': 'Basic ' + base64.b64encode(
+            self.TEST_USER['username'] + ':' + self.TEST_USER['password'])}
+
+    def test_concurrency_limit_full__503_retry_after(self):
+        admission.configure({'Users': {'concurrency': 1}})
+        limiter = admission.limiters['Users']
+        limiter.acquire()
+        try:
+            response = self.client.post(self.TEST_USERS_ENDPOINT,
+                                        json=self.TEST_USER)
+        finally:
+            limiter.release()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '1')
+        response = self.client.post(self.TEST_USERS_ENDPOINT,
+                                    json=self.TEST_USER)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(limiter.stats['active'], 0)
+
+    def test_other_methods__not_limited(self):
+        admission.configure({'User': {'concurrency': 1}})
+        admission.limiters['User'].acquire()
+        response = self.client.post(self.TEST_USERS_ENDPOINT,
+                                    json=self.TEST_USER)
+        url = self.TEST_USER_ENDPOINT.format(response.json['user']['id'])
+        response = self.client.get(url,
+                                   headers=self.get_basic_auth_headers())
+        self.assertEqual(response.status_code, 200)
+
+    def test_account_rate_exceeded__429_retry_after(self):
+        admission.configure({'User': {'methods': ['GET'], 'rate': 0.5,
+                                      'burst': 1}})
+        response = self.client.post(self.TEST_USERS_ENDPOINT,
+                                    json=self.TEST_USER)
+        url = self.TEST_USER_ENDPOINT.format(response.json['user']['id'])
+        headers = self.get_basic_auth_headers()
+        self.assertEqual(self.client.get(url, headers=headers).status_code,
+                         200)
+        response = self.client.get(url, headers=headers)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['Retry-After'], '2')
+        self.assertIn('jokes_api_admission_user_rate_limit_rejected 1.0',
+                      metrics.render().splitlines())
+
+
+if __name__ == '__main__':
+    unittest.main()
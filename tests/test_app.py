@@ -0,0 +1,59 @@
+import os
+import shutil
+import tempfile
+import unittest
+from flask_app import create_app
+
+
+class CreateAppTestCase(unittest.TestCase):
+
+    TEST_USERS_ENDPOINT = 'v1/users'
+    TEST_DATABASE_URL = 'sqlite://'
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.apps = []
+
+    def tearDown(self):
+        for app in self.apps:
+            app.extensions['logger'].close()
+        shutil.rmtree(self.workdir)
+
+    def create_app(self, name, **config):
+        config.setdefault('DATABASE_URL', self.TEST_DATABASE_URL)
+        config.setdefault('LOG_FILE', os.path.join(self.workdir,
+                                                   name + '.log'))
+        app = create_app(config)
+        self.apps.append(app)
+        return app
+
+    def post_user(self, app):
+        return app.test_client().post(self.TEST_USERS_ENDPOINT,
+                                      json={'username': 'Dino',
+                                            'password': 'Tirex'})
+
+    def test_create_app__config_overrides_defaults(self):
+        app = self.create_app('app', JOKES_PAGE_SIZE=7)
+        self.assertEqual(app.config['JOKES_PAGE_SIZE'], 7)
+        self.assertEqual(app.config['JOKES_MAX_PAGE_SIZE'], 500)
+
+    def test_create_app__database_initialized_on_first_request(self):
+        app = self.create_app('app')
+        database = app.extensions['database']
+        self.assertIsNone(database._engine)
+        response = self.post_user(app)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(str(database.engine.url), self.TEST_DATABASE_URL)
+
+    def test_create_two_apps__each_uses_own_components(self):
+        first = self.create_app('first')
+        second = self.create_app('second')
+        self.assertEqual(self.post_user(first).status_code, 201)
+        self.assertEqual(self.post_user(second).status_code, 201)
+        self.assertEqual(self.post_user(first).status_code, 409)
+        self.assertIsNot(first.extensions['database'],
+                         second.extensions['database'])
+        self.assertEqual(first.extensions['logger'].filename,
+                         os.path.join(self.workdir, 'first.log'))
+        self.assertEqual(second.extensions['logger'].filename,
+                         os.path.join(self.workdir, 'second.log'))
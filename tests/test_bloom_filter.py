@@ -0,0 +1,51 @@
+import unittest
+from flask_app.bloom_filter import BloomFilter
+from flask_app.models import text_digest
+
+
+class BloomFilterTestCase(unittest.TestCase):
+
+    TEST_CAPACITY = 1000
+    TEST_ERROR_RATE = 0.01
+
+    def setUp(self):
+        self.bloom_filter = BloomFilter(self.TEST_CAPACITY,
+                                        self.TEST_ERROR_RATE)
+
+    def digests(self, prefix, count):
+        return [text_digest('{0} {1}'.format(prefix, i))
+                for i in xrange(count)]
+
+    def test_not_warmed__might_contain_everything(self):
+        self.assertTrue(self.bloom_filter.might_contain(
+            text_digest('Chuck Norris')))
+
+    def test_warm__no_false_negatives(self):
+        digests = self.digests('joke', self.TEST_CAPACITY)
+        self.bloom_filter.warm(digests)
+        self.assertTrue(all(self.bloom_filter.might_contain(digest)
+                            for digest in digests))
+
+    def test_warm__false_positive_rate_near_target(self):
+        self.bloom_filter.warm(self.digests('joke', self.TEST_CAPACITY))
+        false_positives = sum(self.bloom_filter.might_contain(digest)
+                              for digest in self.digests('other', 10000))
+        self.assertLess(false_positives, 10000 * self.TEST_ERROR_RATE * 2)
+
+    def test_add_after_warm__contained(self):
+        self.bloom_filter.warm([])
+        digest = text_digest('Chuck Norris')
+        self.assertFalse(self.bloom_filter.might_contain(digest))
+        self.bloom_filter.add(digest)
+        self.assertTrue(self.bloom_filter.might_contain(digest))
+
+    def test_disabled__might_contain_everything(self):
+        self.bloom_filter.warm([])
+        self.bloom_filter.enabled = False
+        self.assertTrue(self.bloom_filter.might_contain(
+            text_digest('Chuck Norris')))
+
+    def test_text_digest__normalized_fixed_width(self):
+        digest = text_digest(u'Chuck  Norris\n')
+        self.assertEqual(digest, text_digest('chuck norris'))
+        self.assertEqual(len(digest), 40)
@@ -0,0 +1,96 @@
+import base64
+import unittest
+from flask_app import create_app
+from flask_app.compression import compress, decompress
+from flask_app.models import UserModel, JokeModel, session
+
+
+app = create_app()
+compressor = app.extensions['compression']
+response_cache = app.extensions['response_cache']
+
+
+class CompressTestCase(unittest.TestCase):
+
+    def test_gzip__round_trip_and_smaller(self):
+        data = '{"id":1,"text":"Chuck Norris"},' * 100
+        body = compress(data, 'gzip', 6)
+        self.assertLess(len(body), len(data))
+        self.assertEqual(decompress(body, 'gzip'), data)
+
+
+class CompressionEndpointTestCase(unittest.TestCase):
+
+    TEST_USERS_ENDPOINT = 'v1/users'
+    TEST_USER_ENDPOINT = 'v1/users/{0}'
+    TEST_JOKES_ENDPOINT = 'v1/users/{0}/jokes'
+    TEST_USER = {'username': 'Dino', 'password': 'Tirex'}
+    TEST_JOKES_COUNT = 100
+
+    def setUp(self):
+        self.client = app.test_client()
+        response = self.client.post(self.TEST_USERS_ENDPOINT,
+                                    json=self.TEST_USER)
+        self.user_id = response.json['user']['id']
+        with app.app_context():
+            session.add_all([JokeModel(
+                text='Chuck Norris joke {0}'.format(i), user_id=self.user_id)
+                for i in xrange(self.TEST_JOKES_COUNT)])
+            session.commit()
+        compressor.reset_stats()
+
+    def tearDown(self):
+        with app.app_context():
+            session.query(JokeModel).delete()
+            session.query(UserModel).delete()
+            session.commit()
+        response_cache.clear()
+        compressor.cache.clear()
+
+    def get(self, url, **headers):
+        headers['Authorization'] = 'Basic ' + base64.b64encode(
+            self.TEST_USER['username'] + ':' + self.TEST_USER['password'])
+        return self.client.get(url, headers=headers)
+
+    def test_get_jokes_accept_gzip__compressed_same_etag(self):
+        url = self.TEST_JOKES_ENDPOINT.format(self.user_id)
+        plain = self.get(url)
+        response = self.get(url, **{'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(response.headers['ETag'], plain.headers['ETag'])
+        self.assertLess(len(response.data), len(plain.data))
+        self.assertEqual(decompress(response.data, 'gzip'), plain.data)
+
+    def test_get_jokes_twice__compressed_once(self):
+        url = self.TEST_JOKES_ENDPOINT.format(self.user_id)
+        first = self.get(url, **{'Accept-Encoding': 'gzip'})
+        second = self.get(url, **{'Accept-Encoding': 'gzip'})
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(compressor.stats['compressed'], 1)
+        self.assertEqual(compressor.stats['cache_hits'], 1)
+
+    def test_get_jokes_no_accept_encoding__identity(self):
+        url = self.TEST_JOKES_ENDPOINT.format(self.user_id)
+        response = self.get(url)
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        response = self.get(url, **{'Accept-Encoding': 'gzip;q=0'})
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_get_small_response__not_compressed(self):
+        url = self.TEST_USER_ENDPOINT.format(self.user_id)
+        response = self.get(url, **{'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_get_jokes_compressed_etag__304_not_modified(self):
+        url = self.TEST_JOKES_ENDPOINT.format(self.user_id)
+        response = self.get(url, **{'Accept-Encoding': 'gzip'})
+        response = self.get(url, **{'Accept-Encoding': 'gzip',
+                                    'If-None-Match': response.headers['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import time
+import unittest
+from flask_app.credential_cache import CredentialCache
+
+
+class CredentialCacheTestCase(unittest.TestCase):
+
+    TEST_USERNAME = 'Dino'
+    TEST_PASSWORD = 'Tirex'
+    TEST_HASH = 'pbkdf2:sha256:50000$salt$hash'
+    OTHER_HASH = 'pbkdf2:sha256:50000$salt$other'
+
+    def setUp(self):
+        self.cache = CredentialCache(max_size=2, ttl=60)
+
+    def test_empty_cache__miss(self):
+        self.assertFalse(self.cache.check(self.TEST_USERNAME, self.TEST_HASH,
+                                          self.TEST_PASSWORD))
+        self.assertEqual(self.cache.stats['misses'], 1)
+
+    def test_added_credentials__hit(self):
+        self.cache.add(self.TEST_USERNAME, self.TEST_HASH, self.TEST_PASSWORD)
+        self.assertTrue(self.cache.check(self.TEST_USERNAME, self.TEST_HASH,
+                                         self.TEST_PASSWORD))
+        self.assertEqual(self.cache.stats['hits'], 1)
+
+    def test_wrong_password__miss(self):
+        self.cache.add(self.TEST_USERNAME, self.TEST_HASH, self.TEST_PASSWORD)
+        self.assertFalse(self.cache.check(self.TEST_USERNAME, self.TEST_HASH,
+                                          'wrong'))
+
+    def test_changed_password_hash__miss(self):
+        self.cache.add(self.TEST_USERNAME, self.TEST_HASH, self.TEST_PASSWORD)
+        self.assertFalse(self.cache.check(self.TEST_USERNAME, self.OTHER_HASH,
+                                          self.TEST_PASSWORD))
+
+    def test_plaintext_password__not_stored(self):
+        self.cache.add(self.TEST_USERNAME, self.TEST_HASH, self.TEST_PASSWORD)
+        for digest, expires in self.cache._entries.values():
+            self.assertNotIn(self.TEST_PASSWORD, digest)
+
+    def test_expired_entry__miss(self):
+        self.cache.ttl = 0.01
+        self.cache.add(self.TEST_USERNAME, self.TEST_HASH, self.TEST_PASSWORD)
+        time.sleep(0.02)
+        self.assertFalse(self.cache.check(self.TEST_USERNAME, self.TEST_HASH,
+                                          self.TEST_PASSWORD))
+
+    def test_oldest_entry__evicted(self):
+        for username in ('first', 'second', 'third'):
+            self.cache.add(username, self.TEST_HASH, self.TEST_PASSWORD)
+        self.assertEqual(self.cache.stats['size'], 2)
+        self.assertFalse(self.cache.check('first', self.TEST_HASH,
+                                          self.TEST_PASSWORD))
+
+    def test_invalidate__miss(self):
+        self.cache.add(self.TEST_USERNAME, self.TEST_HASH, self.TEST_PASSWORD)
+        self.cache.invalidate(self.TEST_USERNAME)
+        self.assertFalse(self.cache.check(self.TEST_USERNAME, self.TEST_HASH,
+                                          self.TEST_PASSWORD))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import threading
+import time
+import unittest
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from SocketServer import ThreadingMixIn
+from flask_app.geek_jokes_api import GeekJokesApi, CircuitBreaker
+
+
+class StubJokesHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        server.hits += 1
+        if server.delay:
+            time.sleep(server.delay)
+        body = server.body
+        self.send_response(server.status_code)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubJokesServer(ThreadingMixIn, HTTPServer):
+
+    daemon_threads = True
+
+    def __init__(self):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), StubJokesHandler)
+        self.hits = 0
+        self.delay = 0
+        self.status_code = 200
+        self.body = '"A stub joke."\n'
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{0}/api'.format(self.server_address[1])
+
+
+class GeekJokesApiTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubJokesServer()
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.api = GeekJokesApi(self.server.url,
+                                CircuitBreaker(failure_threshold=3,
+                                               reset_timeout=60))
+        self.api.backoff_base = 0
+        self.api.timeout = (1, 0.2)
+
+    def tearDown(self):
+        self.api.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_get_a_joke__stripped_text(self):
+        self.assertEqual(self.api.get_a_joke(), '"A stub joke."')
+
+    def test_get_jokes__fetched_concurrently(self):
+        self.server.delay = 0.1
+        started = time.time()
+        jokes = self.api.get_jokes(4)
+        self.assertEqual(jokes, ['"A stub joke."'] * 4)
+        self.assertLess(time.time() - started, 0.35)
+
+    def test_get_a_joke_twice__connection_reused(self):
+        self.api.get_a_joke()
+        self.api.get_a_joke()
+        stats = self.api.stats
+        self.assertEqual(stats['connections'], 1)
+        self.assertEqual(stats['reused_connections'], 1)
+
+    def test_slow_upstream__times_out(self):
+        self.server.delay = 0.5
+        self.api.retry_times = 1
+        started = time.time()
+        self.assertIsNone(self.api.get_a_joke())
+        self.assertLess(time.time() - started, 0.5)
+
+    def test_failing_upstream__breaker_opens_and_fails_fast(self):
+        self.server.status_code = 500
+        self.assertIsNone(self.api.get_a_joke())
+        self.assertEqual(self.server.hits, 3)
+        self.assertEqual(self.api.stats['breaker']['state'],
+                         CircuitBreaker.OPEN)
+        self.assertIsNone(self.api.get_a_joke())
+        self.assertEqual(self.server.hits, 3)
+
+    def test_recovered_upstream__breaker_closes(self):
+        self.server.status_code = 500
+        self.api.get_a_joke()
+        self.api.breaker.reset_timeout = 0
+        self.server.status_code = 200
+        self.assertEqual(self.api.get_a_joke(), '"A stub joke."')
+        self.assertEqual(self.api.stats['breaker']['state'],
+                         CircuitBreaker.CLOSED)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import itertools
+import time
+import unittest
+from flask_app.geek_jokes_api import JokePool
+
+
+class CountingJokesApi:
+
+    def __init__(self, texts=None):
+        self.texts = texts
+        self.counter = itertools.count()
+
+    def get_a_joke(self):
+        number = next(self.counter)
+        if self.texts is not None:
+            return self.texts[number % len(self.texts)]
+        return 'joke number {0}'.format(number)
+
+
+class JokePoolTestCase(unittest.TestCase):
+
+    WAIT_SECONDS = 5
+
+    def wait_for_refill(self, pool, size):
+        deadline = time.time() + self.WAIT_SECONDS
+        while pool.stats['size'] < size and time.time() < deadline:
+            time.sleep(0.01)
+
+    def test_empty_pool__live_fetch_and_miss(self):
+        pool = JokePool(CountingJokesApi(), size=0)
+        self.assertEqual(pool.get_a_joke(), 'joke number 0')
+        self.assertEqual(pool.stats['misses'], 1)
+
+    def test_pool_refilled__hit(self):
+        pool = JokePool(CountingJokesApi(), size=4, low_water_mark=1)
+        pool.get_a_joke()
+        self.wait_for_refill(pool, 4)
+        self.assertEqual(pool.stats['size'], 4)
+        self.assertTrue(pool.get_a_joke())
+        self.assertEqual(pool.stats['hits'], 1)
+
+    def test_duplicates__not_pooled(self):
+        pool = JokePool(CountingJokesApi(['same']), size=4, refill_workers=1)
+        pool.pop()
+        self.wait_for_refill(pool, 1)
+        time.sleep(0.05)
+        self.assertEqual(pool.stats['size'], 1)
+
+    def test_put_back__popped_first_without_duplicates(self):
+        pool = JokePool(CountingJokesApi(), size=3, refill_workers=0)
+        pool.put_back(['first', 'second'])
+        pool.put_back(['second', 'third', 'fourth'])
+        self.assertEqual(pool.stats['size'], 3)
+        self.assertEqual(pool.pop(), 'third')
+        self.assertEqual(pool.pop(), 'first')
+
+
+if __name__ == '__main__':
+    unittest.main()
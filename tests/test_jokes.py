@@ -1,7 +1,14 @@
 import base64
+import json
 import unittest
-from flask_app import app
+from flask_app import create_app
 from flask_app.models import UserModel, JokeModel, session
+from flask_app.resource_classes import warm_joke_filter
+
+
+app = create_app()
+joke_pool = app.extensions['joke_pool']
+response_cache = app.extensions['response_cache']
 
 
 class UsersTestCase(unittest.TestCase):
@@ -22,9 +29,21 @@ class UsersTestCase(unittest.TestCase):
         self.empty_user = {'username': '', 'password': ''}
 
     def tearDown(self):
-        session.query(JokeModel).delete()
-        session.query(UserModel).delete()
-        session.commit()
+        with app.app_context():
+            session.query(JokeModel).delete()
+            session.query(UserModel).delete()
+            session.commit()
+        response_cache.clear()
+        for name in ('get_a_joke', 'get_jokes', 'put_back'):
+            joke_pool.__dict__.pop(name, None)
+
+    def stub_joke_pool(self, texts):
+        texts = iter(texts)
+        joke_pool.get_a_joke = lambda: next(texts, None)
+        joke_pool.get_jokes = lambda count: [next(texts, None)
+                                             for i in xrange(count)]
+        self.put_back = []
+        joke_pool.put_back = self.put_back.extend
 
     def get_non_exisiting_id(self):
         return self.NON_EXISTING_ID
@@ -41,6 +60,17 @@ class UsersTestCase(unittest.TestCase):
         response = self.client.post(url, headers=headers)
         return response.json['joke']['id']
 
+    def add_jokes_to_user_return_ids(self, user_id, count):
+        jokes = [JokeModel(text='joke {0} of {1}'.format(i, user_id),
+                           user_id=user_id) for i in xrange(count)]
+        with app.app_context():
+            session.add_all(jokes)
+            users = session.query(UserModel).filter(UserModel.id_ == user_id)
+            users.update({UserModel.jokes_version:
+                          UserModel.jokes_version + 1})
+            session.commit()
+            return [joke.id_ for joke in jokes]
+
     def get_basic_auth_headers(self, user=None):
         if user is None:
             user = self.user
@@ -107,6 +137,109 @@ class UsersTestCase(unittest.TestCase):
         response = self.client.get(url, headers=headers)
         self.assertEqual(response.status_code, 200)
 
+    def test_get_jokes__same_payload_as_serialize(self):
+        user_id = self.add_test_user_return_id()
+        self.add_jokes_to_user_return_ids(user_id, 2)
+        joke = JokeModel(text=u'"Quoted" \u0448\u0443\u0442\u043a\u0430',
+                         user_id=user_id)
+        with app.app_context():
+            session.add(joke)
+            session.commit()
+            expected = [j.serialize for j in session.query(JokeModel)
+                        .order_by(JokeModel.id_)]
+        headers = self.get_basic_auth_headers()
+        url = self.TEST_JOKES_ENDPOINT.format(user_id)
+        response = self.client.get(url, headers=headers)
+        self.assertEqual(response.json['jokes'], expected)
+
+    def test_get_jokes_limit__first_page_and_next_link(self):
+        user_id = self.add_test_user_return_id()
+        joke_ids = self.add_jokes_to_user_return_ids(user_id, 5)
+        headers = self.get_basic_auth_headers()
+        url = self.TEST_JOKES_ENDPOINT.format(user_id) + '?limit=2'
+        response = self.client.get(url, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([j['id'] for j in response.json['jokes']],
+                         joke_ids[:2])
+        self.assertIn('after={0}'.format(joke_ids[1]), response.json['next'])
+        self.assertIn('rel="next"', response.headers['Link'])
+
+    def test_get_jokes_limit_after__pages_cover_all_jokes(self):
+        user_id = self.add_test_user_return_id()
+        joke_ids = self.add_jokes_to_user_return_ids(user_id, 5)
+        headers = self.get_basic_auth_headers()
+        url = self.TEST_JOKES_ENDPOINT.format(user_id) + '?limit=2'
+        seen_ids = []
+        while url:
+            response = self.client.get(url, headers=headers)
+            seen_ids.extend(j['id'] for j in response.json['jokes'])
+            url = response.json['next']
+        self.assertEqual(seen_ids, joke_ids)
+
+    def test_get_jokes_wrong_limit__400_bad_request(self):
+        user_id = self.add_test_user_return_id()
+        headers = self.get_basic_auth_headers()
+        url = self.TEST_JOKES_ENDPOINT.format(user_id) + '?limit=many'
+        response = self.client.get(url, headers=headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_jokes_stream__200_OK_all_jokes(self):
+        user_id = self.add_test_user_return_id()
+        joke_ids = self.add_jokes_to_user_return_ids(user_id, 5)
+        headers = self.get_basic_auth_headers()
+        url = self.TEST_JOKES_ENDPOINT.format(user_id) + '?stream=1'
+        response = self.client.get(url, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        jokes = json.loads(response.get_data())['jokes']
+        self.assertEqual([j['id'] for j in jokes], joke_ids)
+
+    def test_get_jokes_matching_etag__304_not_modified(self):
+        user_id = self.add_test_user_return_id()
+        self.add_jokes_to_user_return_ids(user_id, 2)
+        headers = self.get_basic_auth_headers()
+        url = self.TEST_JOKES_ENDPOINT.format(user_id)
+        response = self.client.get(url, headers=headers)
+        headers['If-None-Match'] = response.headers['ETag']
+        response = self.client.get(url, headers=headers)
+        self.assertEqual(response.status_code, 304)
+
+    def test_get_jokes_etag_after_change__200_OK(self):
+        user_id = self.add_test_user_return_id()
+        joke_ids = self.add_jokes_to_user_return_ids(user_id, 2)
+        headers = self.get_basic_auth_headers()
+        url = self.TEST_JOKES_ENDPOINT.format(user_id)
+        response = self.client.get(url, headers=headers)
+        etag = response.headers['ETag']
+        joke_url = self.TEST_JOKE_ENDPOINT.format(user_id, joke_ids[0])
+        self.client.delete(joke_url, headers=headers)
+        headers['If-None-Match'] = etag
+        response = self.client.get(url, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json['jokes']), 1)
+
+    def test_get_jokes_twice__second_served_from_cache(self):
+        user_id = self.add_test_user_return_id()
+        self.add_jokes_to_user_return_ids(user_id, 2)
+        headers = self.get_basic_auth_headers()
+        url = self.TEST_JOKES_ENDPOINT.format(user_id)
+        response1 = self.client.get(url, headers=headers)
+        response2 = self.client.get(url, headers=headers)
+        self.assertEqual(response_cache.stats['hits'], 1)
+        self.assertEqual(response1.get_data(), response2.get_data())
+
+    def test_get_jokes_after_delete__cache_invalidated(self):
+        user_id = self.add_test_user_return_id()
+        joke_ids = self.add_jokes_to_user_return_ids(user_id, 2)
+        headers = self.get_basic_auth_headers()
+        url = self.TEST_JOKES_ENDPOINT.format(user_id)
+        self.client.get(url, headers=headers)
+        joke_url = self.TEST_JOKE_ENDPOINT.format(user_id, joke_ids[0])
+        self.client.delete(joke_url, headers=headers)
+        self.assertEqual(response_cache.stats['entries'], 0)
+        response = self.client.get(url, headers=headers)
+        self.assertEqual([j['id'] for j in response.json['jokes']],
+                         [joke_ids[1]])
+
     # POST v1/users/{0}/jokes
 
     def test_post_jokes_of_existing_user_no_auth__401_unauthorized(self):
@@ -163,6 +296,178 @@ class UsersTestCase(unittest.TestCase):
         self.assertEqual(response.status_code, 201)
         self.assertIn('text', response.json['joke'])
 
+    def test_post_jokes_text_added_elsewhere__201_next_candidate(self):
+        user_id = self.add_test_user_return_id()
+        with app.app_context():
+            warm_joke_filter()
+            session.add(JokeModel(text='Shared joke', user_id=user_id))
+            session.commit()
+        self.stub_joke_pool(['Shared joke', 'Other joke'])
+        headers = self.get_basic_auth_headers()
+        url = self.TEST_JOKES_ENDPOINT.format(user_id)
+        response = self.client.post(url, headers=headers)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json['joke']['text'], 'Other joke')
+
+    def test_post_jokes_count_text_added_elsewhere__201_created(self):
+        user_id = self.add_test_user_return_id()
+        with app.app_context():
+            warm_joke_filter()
+            session.add(JokeModel(text='Shared joke', user_id=user_id))
+            session.commit()
+        self.stub_joke_pool(['Shared joke', 'Other joke', 'Third joke'])
+        headers = self.get_basic_auth_headers()
+        url = self.TEST_JOKES_ENDPOINT.format(user_id) + '?count=2'
+        response = self.client.post(url, headers=headers)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([j['text'] for j in response.json['jokes']],
+                         ['Other joke', 'Third joke'])
+
+    def test_post_jokes_fetch_width__unused_jokes_put_back(self):
+        user_id = self.add_test_user_return_id()
+        self.stub_joke_pool(['First joke', 'Second joke', 'First joke',
+                             'Third joke'])
+        headers = self.get_basic_auth_headers()
+        url = self.TEST_JOKES_ENDPOINT.format(user_id)
+        self.app.config['JOKES_POST_FETCH_WIDTH'] = 4
+        try:
+            response = self.client.post(url, headers=headers)
+        finally:
+            self.app.config['JOKES_POST_FETCH_WIDTH'] = 1
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json['joke']['text'], 'First joke')
+        self.assertEqual(self.put_back, ['Second joke', 'Third joke'])
+
+    def test_post_jokes_count__201_created_all_jokes(self):
+        user_id = self.add_test_user_return_id()
+        self.stub_joke_pool(['First joke', 'Second joke', 'Third joke'])
+        headers = self.get_basic_auth_headers()
+        url = self.TEST_JOKES_ENDPOINT.format(user_id) + '?count=3'
+        response = self.client.post(url, headers=headers)
+        self.assertEqual(response.status_code, 201)
+        jokes = response.json['jokes']
+        self.assertEqual(len(jokes), 3)
+        self.assertEqual([j['text'] for j in jokes],
+                         ['First joke', 'Second joke', 'Third joke'])
+        self.assertTrue(all(j['user_id'] == user_id for j in jokes))
+
+    def test_post_jokes_too_big_count__400_bad_request(self):
+        user_id = self.add_test_user_return_id()
+        headers = self.get_basic_auth_headers()
+        url = self.TEST_JOKES_ENDPOINT.format(user_id) + '?count=100000'
+        response = self.client.post(url, headers=headers)
+        self.assertEqual(response.status_code, 400)
+
+    # PATCH v1/users/{0}/jokes
+
+    def test_patch_jokes__200_ok_per_id_results(self):
+        user_id = self.add_test_user_return_id()
+        joke_ids = self.add_jokes_to_user_return_ids(user_id, 3)
+        other_user = {'username': 'other', 'password': 'other'}
+        other_user_id = self.add_test_user_return_id(other_user)
+        other_joke_id = self.add_jokes_to_user_return_ids(other_user_id, 1)[0]
+        headers = self.get_basic_auth_headers()
+        url = self.TEST_JOKES_ENDPOINT.format(user_id)
+        updates = [{'id': joke_ids[0], 'text': 'new text 0'},
+                   {'id': joke_ids[1], 'text': 'new text 1'},
+                   {'id': other_joke_id, 'text': 'new text 2'}]
+        response = self.client.patch(url, headers=headers,
+                                     json={'jokes': updates})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['status'] for r in response.json['results']],
+                         [200, 200, 404])
+        response = self.client.get(url, headers=headers)
+        self.assertEqual([j['text'] for j in response.json['jokes']],
+                         ['new text 0', 'new text 1',
+                          'joke 2 of {0}'.format(user_id)])
+
+    def test_patch_jokes_taken_text__409_for_that_id(self):
+        user_id = self.add_test_user_return_id()
+        joke_ids = self.add_jokes_to_user_return_ids(user_id, 2)
+        headers = self.get_basic_auth_headers()
+        url = self.TEST_JOKES_ENDPOINT.format(user_id)
+        updates = [{'id': joke_ids[0],
+                    'text': 'joke 1 of {0}'.format(user_id)}]
+        response = self.client.patch(url, headers=headers,
+                                     json={'jokes': updates})
+        self.assertEqual(response.json['results'][0]['status'], 409)
+
+    def test_patch_jokes_wrong_data__400_bad_request(self):
+        user_id = self.add_test_user_return_id()
+        headers = self.get_basic_auth_headers()
+        url = self.TEST_JOKES_ENDPOINT.format(user_id)
+        response = self.client.patch(url, headers=headers,
+                                     json={'jokes': [{'id': 1}]})
+        self.assertEqual(response.status_code, 400)
+
+    def test_patch_jokes_text_not_string__400_bad_request(self):
+        user_id = self.add_test_user_return_id()
+        joke_id = self.add_jokes_to_user_return_ids(user_id, 1)[0]
+        headers = self.get_basic_auth_headers()
+        url = self.TEST_JOKES_ENDPOINT.format(user_id)
+        for text in (5, ['joke']):
+            response = self.client.patch(
+                url, headers=headers,
+                json={'jokes': [{'id': joke_id, 'text': text}]})
+            self.assertEqual(response.status_code, 400)
+
+    # DELETE v1/users/{0}/jokes
+
+    def test_delete_jokes_ids__200_ok_per_id_results(self):
+        user_id = self.add_test_user_return_id()
+        joke_ids = self.add_jokes_to_user_return_ids(user_id, 3)
+        headers = self.get_basic_auth_headers()
+        url = self.TEST_JOKES_ENDPOINT.format(user_id)
+        ids = [joke_ids[0], joke_ids[2], self.get_non_exisiting_id()]
+        response = self.client.delete(url, headers=headers,
+                                      json={'ids': ids})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['status'] for r in response.json['results']],
+                         [200, 200, 404])
+        response = self.client.get(url, headers=headers)
+        self.assertEqual([j['id'] for j in response.json['jokes']],
+                         [joke_ids[1]])
+
+    def test_delete_jokes_text_contains__matching_deleted(self):
+        user_id = self.add_test_user_return_id()
+        joke_ids = self.add_jokes_to_user_return_ids(user_id, 3)
+        headers = self.get_basic_auth_headers()
+        url = self.TEST_JOKES_ENDPOINT.format(user_id)
+        response = self.client.delete(url, headers=headers,
+                                      json={'text_contains': 'joke 1 '})
+        self.assertEqual(response.json['results'],
+                         [{'id': joke_ids[1], 'status': 200}])
+
+    def test_delete_jokes_text_contains_wildcards__matched_literally(self):
+        user_id = self.add_test_user_return_id()
+        with app.app_context():
+            session.add_all([JokeModel(text=text, user_id=user_id) for text
+                             in ('a_b joke', 'axb joke', '100% joke')])
+            session.commit()
+        headers = self.get_basic_auth_headers()
+        url = self.TEST_JOKES_ENDPOINT.format(user_id)
+        for pattern in ('a_b', '%'):
+            self.client.delete(url, headers=headers,
+                               json={'text_contains': pattern})
+        response = self.client.get(url, headers=headers)
+        self.assertEqual([j['text'] for j in response.json['jokes']],
+                         ['axb joke'])
+
+    def test_delete_jokes_text_contains_not_string__400_bad_request(self):
+        user_id = self.add_test_user_return_id()
+        headers = self.get_basic_auth_headers()
+        url = self.TEST_JOKES_ENDPOINT.format(user_id)
+        response = self.client.delete(url, headers=headers,
+                                      json={'text_contains': ['x']})
+        self.assertEqual(response.status_code, 400)
+
+    def test_delete_jokes_no_data__400_bad_request(self):
+        user_id = self.add_test_user_return_id()
+        headers = self.get_basic_auth_headers()
+        url = self.TEST_JOKES_ENDPOINT.format(user_id)
+        response = self.client.delete(url, headers=headers)
+        self.assertEqual(response.status_code, 400)
+
     # GET v1/users/{0}/jokes/{1}
 
     def test_get_non_existing_joke_of_existing_user_no_auth__401(self):
@@ -359,6 +664,53 @@ class UsersTestCase(unittest.TestCase):
         response = self.client.get(url, headers=headers)
         self.assertEqual(response.json['joke']['text'], data['text'])
 
+    def test_put_joke_text_not_string__400_bad_request(self):
+        user_id = self.add_test_user_return_id()
+        joke_id = self.add_jokes_to_user_return_ids(user_id, 1)[0]
+        headers = self.get_basic_auth_headers()
+        url = self.TEST_JOKE_ENDPOINT.format(user_id, joke_id)
+        response = self.client.put(url, headers=headers, json={'text': 5})
+        self.assertEqual(response.status_code, 400)
+
+    def test_put_joke_normalized_taken_text__409_conflict(self):
+        user_id = self.add_test_user_return_id()
+        joke_ids = self.add_jokes_to_user_return_ids(user_id, 2)
+        headers = self.get_basic_auth_headers()
+        url = self.TEST_JOKE_ENDPOINT.format(user_id, joke_ids[0])
+        data = {'text': ' JOKE 1  of {0}'.format(user_id)}
+        response = self.client.put(url, headers=headers, json=data)
+        self.assertEqual(response.status_code, 409)
+
+    def test_put_joke_matching_if_match__200_ok(self):
+        user_id = self.add_test_user_return_id()
+        joke_id = self.add_jokes_to_user_return_ids(user_id, 1)[0]
+        headers = self.get_basic_auth_headers()
+        url = self.TEST_JOKE_ENDPOINT.format(user_id, joke_id)
+        response = self.client.get(url, headers=headers)
+        headers['If-Match'] = response.headers['ETag']
+        response = self.client.put(url, headers=headers,
+                                   json={'text': 'new text'})
+        self.assertEqual(response.status_code, 200)
+        headers['If-Match'] = response.headers['ETag']
+        response = self.client.put(url, headers=headers,
+                                   json={'text': 'newer text'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_put_joke_stale_if_match__412_precondition_failed(self):
+        user_id = self.add_test_user_return_id()
+        joke_id = self.add_jokes_to_user_return_ids(user_id, 1)[0]
+        headers = self.get_basic_auth_headers()
+        url = self.TEST_JOKE_ENDPOINT.format(user_id, joke_id)
+        response = self.client.get(url, headers=headers)
+        etag = response.headers['ETag']
+        self.client.put(url, headers=headers, json={'text': 'new text'})
+        headers['If-Match'] = etag
+        response = self.client.put(url, headers=headers,
+                                   json={'text': 'newer text'})
+        self.assertEqual(response.status_code, 412)
+        response = self.client.delete(url, headers=headers)
+        self.assertEqual(response.status_code, 412)
+
     # DELETE v1/users/{0}/jokes/{1}
 
     def test_delete_existing_joke_no_auth__401_unauthorized(self):
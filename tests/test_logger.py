@@ -0,0 +1,99 @@
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+from flask_app.logger import Logger, query_log
+
+
+class LoggerTestCase(unittest.TestCase):
+
+    TEST_USERNAME = 'Dino'
+    TEST_IP_ADDRESS = '127.0.0.1'
+    TEST_URL = 'http://localhost/v1/users'
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.logger = Logger(os.path.join(self.workdir, 'log.txt'))
+        self.logger.flush_interval = 0.05
+
+    def tearDown(self):
+        self.logger.close()
+        shutil.rmtree(self.workdir)
+
+    def read_lines(self):
+        with open(self.logger.filename) as handle:
+            return handle.readlines()
+
+    def log_lines(self, count):
+        for i in xrange(count):
+            self.logger.log(self.TEST_USERNAME, None, self.TEST_IP_ADDRESS,
+                            '{0}/{1}'.format(self.TEST_URL, i))
+
+    def test_sync_log__line_written(self):
+        self.logger.async_writes = False
+        self.log_lines(1)
+        self.assertEqual(len(self.read_lines()), 1)
+        self.assertIn(self.TEST_USERNAME, self.read_lines()[0])
+
+    def test_async_log_flush__lines_written_in_order(self):
+        self.log_lines(20)
+        self.logger.flush()
+        lines = self.read_lines()
+        self.assertEqual(len(lines), 20)
+        self.assertTrue(lines[-1].endswith('/19\n'))
+
+    def test_async_log_close__lines_written(self):
+        self.logger.flush_interval = 10
+        self.log_lines(5)
+        self.logger.close()
+        self.assertEqual(len(self.read_lines()), 5)
+
+    def test_full_queue_drop_policy__lines_dropped(self):
+        self.logger.queue.maxsize = 2
+        self.logger._writer = object()
+        self.log_lines(5)
+        self.logger._writer = None
+        self.assertEqual(self.logger.dropped, 3)
+
+    def test_max_bytes__rotated_and_compressed(self):
+        self.logger.async_writes = False
+        self.logger.max_bytes = 1
+        self.log_lines(3)
+        segments = self.logger.rotated_segments()
+        self.assertEqual(len(segments), 2)
+        self.assertTrue(all(path.endswith('.gz') for path in segments))
+        self.assertEqual(len(self.read_lines()), 1)
+
+    def test_backup_count__old_segments_removed(self):
+        self.logger.async_writes = False
+        self.logger.max_bytes = 1
+        self.logger.backup_count = 2
+        self.log_lines(5)
+        self.assertEqual(len(self.logger.rotated_segments()), 2)
+
+    def test_query_log__all_segments_filtered(self):
+        self.logger.async_writes = False
+        self.logger.max_bytes = 1
+        self.log_lines(3)
+        self.logger.log('other', None, self.TEST_IP_ADDRESS, self.TEST_URL)
+        records = list(query_log(self.logger, username=self.TEST_USERNAME))
+        self.assertEqual([r.url for r in records],
+                         ['{0}/{1}'.format(self.TEST_URL, i)
+                          for i in xrange(3)])
+        records = list(query_log(self.logger, url='/1'))
+        self.assertEqual(len(records), 1)
+
+    def test_query_log_time_range__filtered(self):
+        self.logger.async_writes = False
+        old_date = datetime.datetime(2018, 10, 18, 12, 0, 0)
+        self.logger.log(self.TEST_USERNAME, old_date, self.TEST_IP_ADDRESS,
+                        self.TEST_URL)
+        self.log_lines(1)
+        since = datetime.datetime(2018, 10, 19)
+        self.assertEqual(len(list(query_log(self.logger, since=since))), 1)
+        self.assertEqual(len(list(query_log(self.logger, until=since))), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import base64
+import os
+import shutil
+import tempfile
+import unittest
+from flask_app import create_app
+from flask_app.metrics import Histogram, Metrics, stats_collector
+from flask_app.models import UserModel, JokeModel, session
+
+
+app = create_app()
+metrics = app.extensions['metrics']
+response_cache = app.extensions['response_cache']
+
+
+class HistogramTestCase(unittest.TestCase):
+
+    def test_observe__cumulative_buckets(self):
+        histogram = Histogram('test_seconds', 'Test.', ('method',),
+                              buckets=(0.1, 1.0))
+        histogram.observe(0.05, 'GET')
+        histogram.observe(0.5, 'GET')
+        histogram.observe(5, 'GET')
+        lines = list(histogram.render())
+        self.assertIn('# TYPE test_seconds histogram', lines)
+        self.assertIn('test_seconds_bucket{method="GET",le="0.1"} 1', lines)
+        self.assertIn('test_seconds_bucket{method="GET",le="1.0"} 2', lines)
+        self.assertIn('test_seconds_bucket{method="GET",le="+Inf"} 3', lines)
+        self.assertIn('test_seconds_sum{method="GET"} 5.55', lines)
+        self.assertIn('test_seconds_count{method="GET"} 3', lines)
+
+    def test_render__no_observations_only_header(self):
+        histogram = Histogram('test_seconds', 'Test.')
+        self.assertEqual(list(histogram.render()),
+                         ['# HELP test_seconds Test.',
+                          '# TYPE test_seconds histogram'])
+
+    def test_stats_collector__flattens_nested_stats(self):
+        collect = stats_collector(
+            'test', 'Test.',
+            lambda: {'hits': 2, 'breaker': {'state': 'open'}})
+        lines = collect()
+        self.assertIn('test_hits 2.0', lines)
+        self.assertIn('test_breaker_state{state="open"} 1', lines)
+
+
+class MetricsDirectoryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.metrics = Metrics()
+        self.metrics.directory = self.workdir
+        self.metrics.add_collector(stats_collector(
+            'test_pool', 'Test.', lambda: {'size': 3}))
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def test_render__exited_worker_counts_kept_gauges_dropped(self):
+        pid = os.fork()
+        if pid == 0:
+            self.metrics.password_hash_latency.observe(0.5)
+            self.metrics.write_snapshot()
+            os._exit(0)
+        os.waitpid(pid, 0)
+        self.metrics.password_hash_latency.observe(0.5)
+        lines = self.metrics.render().splitlines()
+        self.assertIn('jokes_api_password_hash_seconds_count 2', lines)
+        self.assertIn('test_pool_size 3.0', lines)
+        self.assertEqual(len(os.listdir(self.workdir)), 2)
+
+    def test_render__live_workers_gauges_summed(self):
+        reader, writer = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            self.metrics.write_snapshot()
+            os.write(writer, 'x')
+            os.read(reader, 1)
+            os._exit(0)
+        try:
+            os.read(reader, 1)
+            lines = self.metrics.render().splitlines()
+        finally:
+            os.write(writer, 'x')
+            os.waitpid(pid, 0)
+        self.assertIn('test_pool_size 6.0', lines)
+
+
+class MetricsEndpointTestCase(unittest.TestCase):
+
+    TEST_USERS_ENDPOINT = 'v1/users'
+    TEST_JOKES_ENDPOINT = 'v1/users/{0}/jokes'
+    TEST_METRICS_ENDPOINT = 'metrics'
+    TEST_USERNAME = 'Dino'
+    TEST_PASSWORD = 'Tirex'
+
+    def setUp(self):
+        self.client = app.test_client()
+
+    def tearDown(self):
+        with app.app_context():
+            session.query(JokeModel).delete()
+            session.query(UserModel).delete()
+            session.commit()
+        response_cache.clear()
+
+    def get_basic_auth_headers(self):
+        return {'Authorization': 'Basic ' +
+                base64.b64encode(self.TEST_USERNAME + ':' +
+                                 self.TEST_PASSWORD)}
+
+    def test_get_metrics__200_prometheus_text(self):
+        response = self.client.get(self.TEST_METRICS_ENDPOINT)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        self.assertIn('# TYPE jokes_api_request_seconds histogram',
+                      response.data)
+        self.assertIn('jokes_api_response_cache_hits', response.data)
+
+    def test_get_jokes__request_sql_and_hash_observed(self):
+        response = self.client.post(self.TEST_USERS_ENDPOINT,
+                                    json={'username': self.TEST_USERNAME,
+                                          'password': self.TEST_PASSWORD})
+        account_id = response.json['user']['id']
+        self.client.get(self.TEST_JOKES_ENDPOINT.format(account_id),
+                        headers=self.get_basic_auth_headers())
+        data = metrics.render()
+        self.assertIn('jokes_api_request_seconds_count{resource="Users",'
+                      'method="POST",status="201"}', data)
+        self.assertIn('jokes_api_request_seconds_count{resource="Jokes",'
+                      'method="GET",status="200"}', data)
+        self.assertIn('jokes_api_sql_statement_seconds_count'
+                      '{statement="SELECT"}', data)
+        self.assertIn('jokes_api_password_hash_seconds_count', data)
+
+    def test_unhandled_error__500_observed(self):
+        app = create_app({'DATABASE_URL': 'sqlite://'})
+
+        def fail():
+            raise ValueError('boom')
+        app.add_url_rule('/fail', 'fail', fail)
+        response = app.test_client().get('/fail')
+        self.assertEqual(response.status_code, 500)
+        self.assertIn('jokes_api_request_seconds_count{resource="fail",'
+                      'method="GET",status="500"} 1',
+                      app.extensions['metrics'].render())
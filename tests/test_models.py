@@ -0,0 +1,83 @@
+import os
+import shutil
+import tempfile
+import unittest
+from sqlalchemy import create_engine, inspect
+from flask_app.models import Base, upgrade_schema, make_engine
+from flask_app.models import create_search_index, text_digest
+
+
+class ModelsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine('sqlite://')
+        Base.metadata.create_all(self.engine)
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def get_index_names(self, table_name):
+        inspector = inspect(self.engine)
+        return [index['name'] for index in inspector.get_indexes(table_name)]
+
+    def test_new_database__jokes_user_id_indexed(self):
+        self.assertIn('ix_jokes_user_id', self.get_index_names('jokes'))
+
+    def test_upgrade_old_database__jokes_user_id_indexed(self):
+        self.engine.execute('DROP INDEX ix_jokes_user_id')
+        upgrade_schema(self.engine)
+        self.assertIn('ix_jokes_user_id', self.get_index_names('jokes'))
+
+    def test_upgrade_old_database__users_jokes_version_added(self):
+        self.engine.execute('DROP TABLE users')
+        self.engine.execute('CREATE TABLE users (id_ INTEGER PRIMARY KEY, '
+                            'username VARCHAR(80) NOT NULL, '
+                            'password_hash VARCHAR(120) NOT NULL)')
+        self.engine.execute("INSERT INTO users VALUES (1, 'Dino', 'hash')")
+        upgrade_schema(self.engine)
+        version = self.engine.scalar('SELECT jokes_version FROM users')
+        self.assertEqual(version, 0)
+
+    def test_upgrade_twice__no_error(self):
+        upgrade_schema(self.engine)
+        upgrade_schema(self.engine)
+        self.assertIn('ix_jokes_user_id', self.get_index_names('jokes'))
+
+    def test_upgrade_old_database__jokes_text_digest_backfilled(self):
+        self.engine.execute('DROP TABLE jokes')
+        self.engine.execute('CREATE TABLE jokes (id_ INTEGER PRIMARY KEY, '
+                            'text VARCHAR(120) NOT NULL, user_id INTEGER)')
+        self.engine.execute("INSERT INTO jokes (text) VALUES ('Chuck Norris'),"
+                            " ('chuck  norris'), ('Bruce Lee')")
+        upgrade_schema(self.engine)
+        digests = [row[0] for row in self.engine.execute(
+            'SELECT text_digest FROM jokes ORDER BY id_')]
+        self.assertEqual(digests, [text_digest('Chuck Norris'), None,
+                                   text_digest('Bruce Lee')])
+        self.assertIn('ix_jokes_text_digest', self.get_index_names('jokes'))
+
+    def test_make_sqlite_file_engine__wal_and_pragmas(self):
+        workdir = tempfile.mkdtemp()
+        try:
+            url = 'sqlite:///' + os.path.join(workdir, 'test.db')
+            engine = make_engine(url, pool_size=2)
+            self.assertEqual(engine.scalar('PRAGMA journal_mode'), 'wal')
+            self.assertEqual(engine.scalar('PRAGMA busy_timeout'), 5000)
+            self.assertEqual(engine.pool.size(), 2)
+            engine.dispose()
+        finally:
+            shutil.rmtree(workdir)
+
+    def test_create_search_index__existing_jokes_indexed(self):
+        self.engine.execute("INSERT INTO jokes (text) VALUES ('Chuck Norris')")
+        self.assertTrue(create_search_index(self.engine))
+        self.assertTrue(create_search_index(self.engine))
+        self.engine.execute("INSERT INTO jokes (text) VALUES ('Bruce Lee')")
+        matches = self.engine.execute(
+            "SELECT rowid FROM jokes_fts WHERE jokes_fts MATCH 'chuck OR lee' "
+            "ORDER BY rowid").fetchall()
+        self.assertEqual([row[0] for row in matches], [1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
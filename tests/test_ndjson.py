@@ -0,0 +1,123 @@
+import base64
+import json
+import unittest
+from flask_app import create_app
+from flask_app.models import UserModel, JokeModel, session
+
+
+app = create_app()
+response_cache = app.extensions['response_cache']
+
+
+class NdjsonTestCase(unittest.TestCase):
+
+    TEST_USERS_ENDPOINT = 'v1/users'
+    TEST_JOKES_ENDPOINT = 'v1/users/{0}/jokes'
+    TEST_EXPORT_ENDPOINT = 'v1/users/{0}/jokes/export'
+    TEST_IMPORT_ENDPOINT = 'v1/users/{0}/jokes/import'
+    TEST_USER = {'username': 'Dino', 'password': 'Tirex'}
+    TEST_OTHER_USER = {'username': 'Ptero', 'password': 'Dactyl'}
+    NDJSON = 'application/x-ndjson'
+
+    def setUp(self):
+        self.app = app
+        self.client = app.test_client()
+
+    def tearDown(self):
+        with app.app_context():
+            session.query(JokeModel).delete()
+            session.query(UserModel).delete()
+            session.commit()
+        response_cache.clear()
+
+    def add_user_with_jokes_return_id(self, user, texts):
+        response = self.client.post(self.TEST_USERS_ENDPOINT, json=user)
+        user_id = response.json['user']['id']
+        with app.app_context():
+            session.add_all([JokeModel(text=text, user_id=user_id)
+                             for text in texts])
+            session.commit()
+        return user_id
+
+    def get_basic_auth_headers(self, user=None):
+        user = self.TEST_USER if user is None else user
+        return {'Authorization': 'Basic ' +
+                base64.b64encode(user['username'] + ':' + user['password'])}
+
+    def import_jokes(self, user_id, body):
+        return self.client.post(self.TEST_IMPORT_ENDPOINT.format(user_id),
+                                data=body, content_type=self.NDJSON,
+                                headers=self.get_basic_auth_headers())
+
+    def get_texts(self, user_id):
+        response = self.client.get(self.TEST_JOKES_ENDPOINT.format(user_id),
+                                   headers=self.get_basic_auth_headers())
+        return [joke['text'] for joke in response.json['jokes']]
+
+    def test_export__own_jokes_one_per_line(self):
+        user_id = self.add_user_with_jokes_return_id(
+            self.TEST_USER, ['joke {0}'.format(i) for i in xrange(3)])
+        self.add_user_with_jokes_return_id(self.TEST_OTHER_USER, ['other'])
+        response = self.client.get(self.TEST_EXPORT_ENDPOINT.format(user_id),
+                                   headers=self.get_basic_auth_headers())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, self.NDJSON)
+        jokes = [json.loads(line) for line in response.data.splitlines()]
+        self.assertEqual([joke['text'] for joke in jokes],
+                         ['joke 0', 'joke 1', 'joke 2'])
+        self.assertEqual(set(joke['user_id'] for joke in jokes),
+                         set([user_id]))
+
+    def test_export_delete_import__jokes_restored(self):
+        user_id = self.add_user_with_jokes_return_id(
+            self.TEST_USER, ['joke {0}'.format(i) for i in xrange(5)])
+        exported = self.client.get(
+            self.TEST_EXPORT_ENDPOINT.format(user_id),
+            headers=self.get_basic_auth_headers()).data
+        self.assertEqual(len(self.get_texts(user_id)), 5)
+        with app.app_context():
+            session.query(JokeModel).delete()
+            session.commit()
+        self.app.config['JOKES_IMPORT_CHUNK_SIZE'] = 2
+        try:
+            response = self.import_jokes(user_id, exported)
+        finally:
+            self.app.config['JOKES_IMPORT_CHUNK_SIZE'] = 500
+        self.assertEqual(response.json, {'imported': 5, 'skipped': 0})
+        self.assertEqual(self.get_texts(user_id),
+                         ['joke {0}'.format(i) for i in xrange(5)])
+
+    def test_import_duplicates__skipped(self):
+        user_id = self.add_user_with_jokes_return_id(self.TEST_USER,
+                                                     ['Chuck Norris'])
+        body = '\n'.join(json.dumps({'text': text}) for text in
+                         ['new joke', ' chuck  NORRIS', 'New Joke',
+                          'another joke'])
+        response = self.import_jokes(user_id, body + '\n\n')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, {'imported': 2, 'skipped': 2})
+        self.assertEqual(self.get_texts(user_id),
+                         ['Chuck Norris', 'new joke', 'another joke'])
+
+    def test_import_bad_line__400_earlier_chunks_kept(self):
+        user_id = self.add_user_with_jokes_return_id(self.TEST_USER, [])
+        body = '{"text": "first"}\n{"text": "second"}\nnot json\n'
+        self.app.config['JOKES_IMPORT_CHUNK_SIZE'] = 1
+        try:
+            response = self.import_jokes(user_id, body)
+        finally:
+            self.app.config['JOKES_IMPORT_CHUNK_SIZE'] = 500
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('line 3', response.json['message'])
+        self.assertEqual(self.get_texts(user_id), ['first', 'second'])
+
+    def test_import_other_user__403(self):
+        self.add_user_with_jokes_return_id(self.TEST_USER, [])
+        other_id = self.add_user_with_jokes_return_id(self.TEST_OTHER_USER,
+                                                      [])
+        response = self.import_jokes(other_id, '{"text": "joke"}\n')
+        self.assertEqual(response.status_code, 403)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import signal
+import socket
+import threading
+import unittest
+import urllib2
+from flask import Flask
+from flask_app import prefork
+from flask_app.prefork import PreforkServer, PreforkWSGIServer
+
+
+def make_pid_app():
+    app = Flask(__name__)
+    app.add_url_rule('/', 'pid', lambda: str(os.getpid()))
+    return app
+
+
+class PreforkTestCase(unittest.TestCase):
+
+    TEST_HOST = '127.0.0.1'
+
+    def get(self, port):
+        url = 'http://{0}:{1}/'.format(self.TEST_HOST, port)
+        return urllib2.urlopen(url, timeout=10).read()
+
+    def test_worker_max_requests__stops_serving(self):
+        listener = socket.socket()
+        listener.bind((self.TEST_HOST, 0))
+        listener.listen(8)
+        port = listener.getsockname()[1]
+        server = PreforkWSGIServer(self.TEST_HOST, port, make_pid_app(),
+                                   listener.fileno(), threads=2,
+                                   max_requests=2)
+        thread = threading.Thread(target=server.serve_until_stopped)
+        thread.start()
+        pids = [self.get(port) for i in xrange(2)]
+        thread.join(5)
+        listener.close()
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(pids, [str(os.getpid())] * 2)
+
+    def test_prefork_max_requests__worker_recycled(self):
+        server = PreforkServer(make_pid_app(), self.TEST_HOST, 0, workers=1,
+                               max_requests=1, graceful_timeout=5)
+        server.POLL_INTERVAL = 0.05
+        server.listen()
+        master = os.fork()
+        if master == 0:
+            try:
+                server.serve_forever()
+            finally:
+                os._exit(0)
+        try:
+            pids = [self.get(server.port) for i in xrange(2)]
+        finally:
+            os.kill(master, signal.SIGTERM)
+            os.waitpid(master, 0)
+            server.socket.close()
+        self.assertNotEqual(pids[0], pids[1])
+        self.assertNotIn(str(os.getpid()), pids)
+        self.assertNotIn(str(master), pids)
+
+    def test_forked_workers__max_requests_jitter_differs(self):
+        read_fd, write_fd = os.pipe()
+
+        class ReportingServer(object):
+
+            def __init__(self, host, port, app, fd, threads, max_requests):
+                os.write(write_fd, '{0}\n'.format(max_requests))
+
+            def serve_until_stopped(self):
+                pass
+
+        server = PreforkServer(make_pid_app(), self.TEST_HOST, 0, workers=4,
+                               max_requests=1000,
+                               max_requests_jitter=10 ** 9)
+        server.listen()
+        children = []
+        for i in xrange(4):
+            pid = os.fork()
+            if pid == 0:
+                prefork.PreforkWSGIServer = ReportingServer
+                server.run_worker()
+            children.append(pid)
+        for pid in children:
+            os.waitpid(pid, 0)
+        os.close(write_fd)
+        server.socket.close()
+        values = os.fdopen(read_fd).read().split()
+        self.assertEqual(len(values), 4)
+        self.assertEqual(len(set(values)), 4)
@@ -0,0 +1,81 @@
+import StringIO
+import os
+import shutil
+import tempfile
+import unittest
+from flask_app import create_app
+from flask_app.profiler import summarize_profiles
+
+
+app = create_app()
+profiler = app.extensions['profiler']
+
+
+class ProfilerTestCase(unittest.TestCase):
+
+    TEST_USERS_ENDPOINT = 'v1/users'
+    TEST_USER_ENDPOINT = 'v1/users/{0}'
+
+    def setUp(self):
+        self.client = app.test_client()
+        self.workdir = tempfile.mkdtemp()
+        self.settings = (profiler.enabled, profiler.directory,
+                         profiler.sample_rate, profiler.url_pattern)
+        profiler.enabled = True
+        profiler.directory = self.workdir
+
+    def tearDown(self):
+        (profiler.enabled, profiler.directory, profiler.sample_rate,
+         profiler.url_pattern) = self.settings
+        shutil.rmtree(self.workdir)
+
+    def test_disabled__header_ignored(self):
+        profiler.enabled = False
+        self.client.get(self.TEST_USER_ENDPOINT.format(1),
+                        headers={'X-Profile': '1'})
+        self.assertEqual(profiler.list_profiles(), [])
+
+    def test_enabled__profile_written_and_listed(self):
+        self.client.get(self.TEST_USER_ENDPOINT.format(1))
+        records = profiler.list_profiles()
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0].method, 'GET')
+        self.assertEqual(records[0].url, '/v1/users/1')
+
+    def test_url_pattern__only_matching_requests_profiled(self):
+        profiler.url_pattern = r'^/v1/users/\d+$'
+        self.client.post(self.TEST_USERS_ENDPOINT, json={})
+        self.client.get(self.TEST_USER_ENDPOINT.format(1))
+        self.assertEqual([record.url for record in profiler.list_profiles()],
+                         ['/v1/users/1'])
+
+    def test_zero_sample_rate_with_header__profile_written(self):
+        profiler.sample_rate = 0.0
+        self.client.get(self.TEST_USER_ENDPOINT.format(1))
+        self.assertEqual(profiler.list_profiles(), [])
+        self.client.get(self.TEST_USER_ENDPOINT.format(1),
+                        headers={'X-Profile': '1'})
+        self.assertEqual(len(profiler.list_profiles()), 1)
+
+    def test_long_url__profile_written_with_short_name(self):
+        url = self.TEST_USER_ENDPOINT.format('9' * 300)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 401)
+        records = profiler.list_profiles()
+        self.assertEqual(len(records), 1)
+        self.assertLess(len(os.path.basename(records[0].path)), 255)
+
+    def test_directory_not_writable__request_served(self):
+        profiler.directory = os.path.join(self.workdir, 'file')
+        open(profiler.directory, 'w').close()
+        response = self.client.get(self.TEST_USER_ENDPOINT.format(1))
+        self.assertEqual(response.status_code, 401)
+
+    def test_summarize_profiles__stats_printed(self):
+        self.client.get(self.TEST_USER_ENDPOINT.format(1))
+        self.client.get(self.TEST_USER_ENDPOINT.format(2))
+        stream = StringIO.StringIO()
+        summarize_profiles([record.path
+                            for record in profiler.list_profiles()],
+                           stream, limit=5)
+        self.assertIn('function calls', stream.getvalue())
@@ -0,0 +1,182 @@
+import base64
+import unittest
+from sqlalchemy import event
+from flask_app import create_app
+from flask_app.resource_classes import warm_joke_filter
+from flask_app.models import UserModel, JokeModel, session
+
+
+app = create_app()
+database = app.extensions['database']
+geek_jokes = app.extensions['geek_jokes']
+joke_filter = app.extensions['joke_filter']
+response_cache = app.extensions['response_cache']
+
+
+class QueriesTestCase(unittest.TestCase):
+
+    TEST_USERS_ENDPOINT = 'v1/users'
+    TEST_TOKENS_ENDPOINT = 'v1/tokens'
+    TEST_USER_ENDPOINT = 'v1/users/{0}'
+    TEST_JOKES_ENDPOINT = 'v1/users/{0}/jokes'
+    TEST_JOKE_ENDPOINT = 'v1/users/{0}/jokes/{1}'
+    TEST_USERNAME = 'Dino'
+    TEST_PASSWORD = 'Tirex'
+    TEST_JOKE_TEXT = 'Chuck Norris can divide by zero.'
+
+    def setUp(self):
+        self.app = app
+        self.client = app.test_client()
+        self.user = {'username': self.TEST_USERNAME,
+                     'password': self.TEST_PASSWORD}
+        self.statements = []
+        event.listen(database.engine, 'before_cursor_execute',
+                     self.count_statement)
+        self.get_a_joke = geek_jokes.get_a_joke
+        geek_jokes.get_a_joke = lambda: self.TEST_JOKE_TEXT
+        with app.app_context():
+            warm_joke_filter()
+
+    def tearDown(self):
+        geek_jokes.get_a_joke = self.get_a_joke
+        event.remove(database.engine, 'before_cursor_execute',
+                     self.count_statement)
+        with app.app_context():
+            session.query(JokeModel).delete()
+            session.query(UserModel).delete()
+            session.commit()
+        response_cache.clear()
+
+    def count_statement(self, conn, cursor, statement, parameters, context,
+                        executemany):
+        self.statements.append(statement)
+
+    def count_statements(self, method, url, **kwargs):
+        del self.statements[:]
+        response = getattr(self.client, method)(url, **kwargs)
+        return response, len(self.statements)
+
+    def get_basic_auth_headers(self):
+        headers = {
+                   'Authorization': 'Basic ' +
+                   base64.b64encode(self.TEST_USERNAME +
+                                    ':' + self.TEST_PASSWORD)
+                  }
+        return headers
+
+    def get_token_auth_headers(self):
+        response = self.client.post(self.TEST_TOKENS_ENDPOINT,
+                                    headers=self.get_basic_auth_headers())
+        return {'Authorization': 'Bearer ' + response.json['token']}
+
+    def add_test_user_return_id(self):
+        response = self.client.post(self.TEST_USERS_ENDPOINT, json=self.user)
+        return response.json['user']['id']
+
+    def add_joke_to_user_return_id(self, user_id):
+        url = self.TEST_JOKES_ENDPOINT.format(user_id)
+        response = self.client.post(url, headers=self.get_basic_auth_headers())
+        return response.json['joke']['id']
+
+    def test_post_users__3_statements(self):
+        response, count = self.count_statements('post',
+                                                self.TEST_USERS_ENDPOINT,
+                                                json=self.user)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(count, 3)
+
+    def test_get_user__1_statement(self):
+        user_id = self.add_test_user_return_id()
+        url = self.TEST_USER_ENDPOINT.format(user_id)
+        response, count = self.count_statements(
+            'get', url, headers=self.get_basic_auth_headers())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(count, 1)
+
+    def test_get_jokes__2_statements(self):
+        user_id = self.add_test_user_return_id()
+        url = self.TEST_JOKES_ENDPOINT.format(user_id)
+        response, count = self.count_statements(
+            'get', url, headers=self.get_basic_auth_headers())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(count, 2)
+
+    def test_get_jokes_token_auth__2_statements(self):
+        user_id = self.add_test_user_return_id()
+        url = self.TEST_JOKES_ENDPOINT.format(user_id)
+        response, count = self.count_statements(
+            'get', url, headers=self.get_token_auth_headers())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(count, 2)
+
+    def test_get_jokes_not_modified__1_statement(self):
+        user_id = self.add_test_user_return_id()
+        self.add_joke_to_user_return_id(user_id)
+        url = self.TEST_JOKES_ENDPOINT.format(user_id)
+        headers = self.get_basic_auth_headers()
+        response = self.client.get(url, headers=headers)
+        headers['If-None-Match'] = response.headers['ETag']
+        response, count = self.count_statements('get', url, headers=headers)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(count, 1)
+
+    def test_post_jokes__4_statements(self):
+        user_id = self.add_test_user_return_id()
+        url = self.TEST_JOKES_ENDPOINT.format(user_id)
+        response, count = self.count_statements(
+            'post', url, headers=self.get_basic_auth_headers())
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(count, 4)
+
+    def test_post_jokes_filter_not_warmed__5_statements(self):
+        user_id = self.add_test_user_return_id()
+        url = self.TEST_JOKES_ENDPOINT.format(user_id)
+        joke_filter.ready = False
+        response, count = self.count_statements(
+            'post', url, headers=self.get_basic_auth_headers())
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(count, 5)
+
+    def test_post_jokes_fetch_width__4_statements(self):
+        user_id = self.add_test_user_return_id()
+        url = self.TEST_JOKES_ENDPOINT.format(user_id)
+        self.app.config['JOKES_POST_FETCH_WIDTH'] = 3
+        try:
+            response, count = self.count_statements(
+                'post', url, headers=self.get_basic_auth_headers())
+        finally:
+            self.app.config['JOKES_POST_FETCH_WIDTH'] = 1
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(count, 4)
+
+    def test_get_joke__2_statements(self):
+        user_id = self.add_test_user_return_id()
+        joke_id = self.add_joke_to_user_return_id(user_id)
+        url = self.TEST_JOKE_ENDPOINT.format(user_id, joke_id)
+        response, count = self.count_statements(
+            'get', url, headers=self.get_basic_auth_headers())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(count, 2)
+
+    def test_put_joke__4_statements(self):
+        user_id = self.add_test_user_return_id()
+        joke_id = self.add_joke_to_user_return_id(user_id)
+        url = self.TEST_JOKE_ENDPOINT.format(user_id, joke_id)
+        response, count = self.count_statements(
+            'put', url, headers=self.get_basic_auth_headers(),
+            json={'text': 'new text'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(count, 4)
+
+    def test_delete_joke__4_statements(self):
+        user_id = self.add_test_user_return_id()
+        joke_id = self.add_joke_to_user_return_id(user_id)
+        url = self.TEST_JOKE_ENDPOINT.format(user_id, joke_id)
+        response, count = self.count_statements(
+            'delete', url, headers=self.get_basic_auth_headers())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(count, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+from flask_app.response_cache import LRUCacheBackend, ResponseCache
+
+
+class ResponseCacheTestCase(unittest.TestCase):
+
+    TEST_ACCOUNT_ID = 1
+    OTHER_ACCOUNT_ID = 2
+    TEST_KEY = '0:/v1/users/1/jokes?'
+    TEST_BODY = '{"jokes": []}'
+
+    def setUp(self):
+        self.cache = ResponseCache(LRUCacheBackend(max_bytes=1000))
+
+    def test_empty_cache__miss(self):
+        self.assertIsNone(self.cache.get(self.TEST_ACCOUNT_ID, self.TEST_KEY))
+        self.assertEqual(self.cache.stats['misses'], 1)
+
+    def test_stored_body__hit(self):
+        self.cache.set(self.TEST_ACCOUNT_ID, self.TEST_KEY, self.TEST_BODY)
+        body, headers = self.cache.get(self.TEST_ACCOUNT_ID, self.TEST_KEY)
+        self.assertEqual(body, self.TEST_BODY)
+        self.assertEqual(self.cache.stats['hit_ratio'], 1.0)
+
+    def test_invalidate__only_that_account_dropped(self):
+        self.cache.set(self.TEST_ACCOUNT_ID, self.TEST_KEY, self.TEST_BODY)
+        self.cache.set(self.TEST_ACCOUNT_ID, 'page', self.TEST_BODY)
+        self.cache.set(self.OTHER_ACCOUNT_ID, self.TEST_KEY, self.TEST_BODY)
+        self.cache.invalidate(self.TEST_ACCOUNT_ID)
+        self.assertIsNone(self.cache.get(self.TEST_ACCOUNT_ID, self.TEST_KEY))
+        self.assertIsNone(self.cache.get(self.TEST_ACCOUNT_ID, 'page'))
+        self.assertIsNotNone(self.cache.get(self.OTHER_ACCOUNT_ID,
+                                            self.TEST_KEY))
+
+    def test_memory_cap__least_recently_used_evicted(self):
+        body = 'x' * 300
+        for key in ('first', 'second', 'third'):
+            self.cache.set(self.TEST_ACCOUNT_ID, key, body)
+        self.assertIsNone(self.cache.get(self.TEST_ACCOUNT_ID, 'first'))
+        self.assertIsNotNone(self.cache.get(self.TEST_ACCOUNT_ID, 'third'))
+        self.assertEqual(self.cache.stats['evictions'], 1)
+        self.assertLessEqual(self.cache.stats['size_bytes'], 1000)
+
+    def test_too_big_body__not_stored(self):
+        self.cache.set(self.TEST_ACCOUNT_ID, self.TEST_KEY, 'x' * 2000)
+        self.assertEqual(self.cache.stats['entries'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import base64
+import unittest
+from flask_app import create_app
+from flask_app.models import UserModel, JokeModel, session
+
+
+app = create_app()
+database = app.extensions['database']
+response_cache = app.extensions['response_cache']
+
+
+class SearchTestCase(unittest.TestCase):
+
+    TEST_USERS_ENDPOINT = 'v1/users'
+    TEST_SEARCH_ENDPOINT = 'v1/jokes/search'
+    TEST_USER_SEARCH_ENDPOINT = 'v1/users/{0}/jokes/search'
+    TEST_JOKE_ENDPOINT = 'v1/users/{0}/jokes/{1}'
+    TEST_USER = {'username': 'Dino', 'password': 'Tirex'}
+    TEST_OTHER_USER = {'username': 'Ptero', 'password': 'Dactyl'}
+
+    def setUp(self):
+        self.client = app.test_client()
+
+    def tearDown(self):
+        with app.app_context():
+            session.query(JokeModel).delete()
+            session.query(UserModel).delete()
+            session.commit()
+        response_cache.clear()
+
+    def add_user_with_jokes_return_id(self, user, texts):
+        response = self.client.post(self.TEST_USERS_ENDPOINT, json=user)
+        user_id = response.json['user']['id']
+        with app.app_context():
+            session.add_all([JokeModel(text=text, user_id=user_id)
+                             for text in texts])
+            session.commit()
+        return user_id
+
+    def get_basic_auth_headers(self, user=None):
+        user = self.TEST_USER if user is None else user
+        return {'Authorization': 'Basic ' +
+                base64.b64encode(user['username'] + ':' + user['password'])}
+
+    def search_texts(self, url, **params):
+        response = self.client.get(url, query_string=params,
+                                   headers=self.get_basic_auth_headers())
+        self.assertEqual(response.status_code, 200)
+        return [joke['text'] for joke in response.json['jokes']]
+
+    def test_search_user_jokes__only_own_matches(self):
+        user_id = self.add_user_with_jokes_return_id(
+            self.TEST_USER, ['Chuck Norris counts to infinity', 'No match'])
+        self.add_user_with_jokes_return_id(
+            self.TEST_OTHER_USER, ['Chuck Norris divides by zero'])
+        texts = self.search_texts(
+            self.TEST_USER_SEARCH_ENDPOINT.format(user_id), q='chuck')
+        self.assertEqual(texts, ['Chuck Norris counts to infinity'])
+
+    def test_search_global__all_users_matches(self):
+        self.add_user_with_jokes_return_id(
+            self.TEST_USER, ['Chuck Norris counts to infinity'])
+        self.add_user_with_jokes_return_id(
+            self.TEST_OTHER_USER, ['Chuck Norris divides by zero'])
+        texts = self.search_texts(self.TEST_SEARCH_ENDPOINT, q='norris')
+        self.assertEqual(len(texts), 2)
+
+    def test_search__all_words_required_and_ranked(self):
+        self.add_user_with_jokes_return_id(
+            self.TEST_USER, ['Chuck Norris once counted to infinity twice',
+                             'Chuck Norris, Chuck Norris',
+                             'Chuck Testa'])
+        texts = self.search_texts(self.TEST_SEARCH_ENDPOINT,
+                                  q='chuck norris')
+        self.assertEqual(texts, ['Chuck Norris, Chuck Norris',
+                                 'Chuck Norris once counted to infinity '
+                                 'twice'])
+
+    def test_search__paginated_with_next_link(self):
+        self.add_user_with_jokes_return_id(
+            self.TEST_USER, ['joke number {0}'.format(i) for i in xrange(5)])
+        response = self.client.get(self.TEST_SEARCH_ENDPOINT,
+                                   query_string={'q': 'joke', 'limit': 3},
+                                   headers=self.get_basic_auth_headers())
+        self.assertEqual(len(response.json['jokes']), 3)
+        self.assertIn('rel="next"', response.headers['Link'])
+        response = self.client.get(response.json['next'],
+                                   headers=self.get_basic_auth_headers())
+        self.assertEqual(len(response.json['jokes']), 2)
+        self.assertIsNone(response.json['next'])
+
+    def test_search_after_update_and_delete__index_in_sync(self):
+        user_id = self.add_user_with_jokes_return_id(
+            self.TEST_USER, ['Chuck Norris counts to infinity',
+                             'Chuck Norris divides by zero'])
+        with app.app_context():
+            ids = [joke_id for joke_id, in
+                   session.query(JokeModel.id_).order_by(JokeModel.id_)]
+        self.client.put(self.TEST_JOKE_ENDPOINT.format(user_id, ids[0]),
+                        json={'text': 'Bruce Lee counts to infinity'},
+                        headers=self.get_basic_auth_headers())
+        self.client.delete(self.TEST_JOKE_ENDPOINT.format(user_id, ids[1]),
+                           headers=self.get_basic_auth_headers())
+        self.assertEqual(self.search_texts(self.TEST_SEARCH_ENDPOINT,
+                                           q='chuck'), [])
+        self.assertEqual(self.search_texts(self.TEST_SEARCH_ENDPOINT,
+                                           q='bruce'),
+                         ['Bruce Lee counts to infinity'])
+
+    def test_search_without_index__like_fallback(self):
+        self.add_user_with_jokes_return_id(
+            self.TEST_USER, ['Chuck Norris counts to infinity', 'No match'])
+        full_text_search = database.full_text_search
+        database.full_text_search = False
+        try:
+            texts = self.search_texts(self.TEST_SEARCH_ENDPOINT, q='norris')
+        finally:
+            database.full_text_search = full_text_search
+        self.assertEqual(texts, ['Chuck Norris counts to infinity'])
+
+    def test_search_no_words__400(self):
+        self.add_user_with_jokes_return_id(self.TEST_USER, [])
+        response = self.client.get(self.TEST_SEARCH_ENDPOINT,
+                                   query_string={'q': '!!'},
+                                   headers=self.get_basic_auth_headers())
+        self.assertEqual(response.status_code, 400)
+
+    def test_search_other_user__403(self):
+        self.add_user_with_jokes_return_id(self.TEST_USER, [])
+        other_id = self.add_user_with_jokes_return_id(self.TEST_OTHER_USER,
+                                                      [])
+        response = self.client.get(
+            self.TEST_USER_SEARCH_ENDPOINT.format(other_id),
+            query_string={'q': 'chuck'},
+            headers=self.get_basic_auth_headers())
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,124 @@
+import base64
+import unittest
+from itsdangerous import TimedJSONWebSignatureSerializer as Serializer
+from flask_app import create_app
+from flask_app.models import UserModel, JokeModel, session
+
+
+app = create_app()
+
+
+class TokensTestCase(unittest.TestCase):
+
+    TEST_USERS_ENDPOINT = 'v1/users'
+    TEST_TOKENS_ENDPOINT = 'v1/tokens'
+    TEST_USER_ENDPOINT = 'v1/users/{0}'
+    TEST_JOKES_ENDPOINT = 'v1/users/{0}/jokes'
+    TEST_USERNAME = 'Dino'
+    TEST_PASSWORD = 'Tirex'
+
+    def setUp(self):
+        self.app = app
+        self.client = app.test_client()
+        self.user = {'username': self.TEST_USERNAME,
+                     'password': self.TEST_PASSWORD}
+
+    def tearDown(self):
+        with app.app_context():
+            session.query(JokeModel).delete()
+            session.query(UserModel).delete()
+            session.commit()
+
+    def add_test_user_return_id(self, user=None):
+        if user is None:
+            user = self.user
+        response = self.client.post(self.TEST_USERS_ENDPOINT, json=user)
+        return response.json['user']['id']
+
+    def get_basic_auth_headers(self, user=None):
+        if user is None:
+            user = self.user
+        headers = {
+                   'Authorization': 'Basic ' +
+                   base64.b64encode(user['username'] +
+                                    ':' + user['password'])
+                  }
+        return headers
+
+    def get_token_auth_headers(self, token):
+        return {'Authorization': 'Bearer ' + token}
+
+    def get_token(self, user=None):
+        headers = self.get_basic_auth_headers(user)
+        response = self.client.post(self.TEST_TOKENS_ENDPOINT, headers=headers)
+        return response.json['token']
+
+    def test_post_tokens_no_auth__401_unauthorized(self):
+        response = self.client.post(self.TEST_TOKENS_ENDPOINT)
+        self.assertEqual(response.status_code, 401)
+
+    def test_post_tokens_wrong_auth__401_unauthorized(self):
+        self.add_test_user_return_id()
+        user = {'username': self.TEST_USERNAME, 'password': 'wrong'}
+        headers = self.get_basic_auth_headers(user)
+        response = self.client.post(self.TEST_TOKENS_ENDPOINT, headers=headers)
+        self.assertEqual(response.status_code, 401)
+
+    def test_post_tokens_correct_auth__201_created(self):
+        self.add_test_user_return_id()
+        headers = self.get_basic_auth_headers()
+        response = self.client.post(self.TEST_TOKENS_ENDPOINT, headers=headers)
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(response.json['token'])
+
+    def test_post_tokens_token_auth__401_unauthorized(self):
+        self.add_test_user_return_id()
+        headers = self.get_token_auth_headers(self.get_token())
+        response = self.client.post(self.TEST_TOKENS_ENDPOINT, headers=headers)
+        self.assertEqual(response.status_code, 401)
+
+    def test_get_jokes_token_auth__200_OK(self):
+        user_id = self.add_test_user_return_id()
+        headers = self.get_token_auth_headers(self.get_token())
+        url = self.TEST_JOKES_ENDPOINT.format(user_id)
+        response = self.client.get(url, headers=headers)
+        self.assertEqual(response.status_code, 200)
+
+    def test_get_jokes_bad_token__401_unauthorized(self):
+        user_id = self.add_test_user_return_id()
+        headers = self.get_token_auth_headers('bad.token.value')
+        url = self.TEST_JOKES_ENDPOINT.format(user_id)
+        response = self.client.get(url, headers=headers)
+        self.assertEqual(response.status_code, 401)
+
+    def test_get_jokes_token_signed_with_other_key__401_unauthorized(self):
+        user_id = self.add_test_user_return_id()
+        for key in ('secret key', 'other key'):
+            serializer = Serializer(key, salt='auth-token')
+            token = serializer.dumps({'id': user_id,
+                                      'username': self.TEST_USERNAME})
+            headers = self.get_token_auth_headers(token.decode('ascii'))
+            url = self.TEST_JOKES_ENDPOINT.format(user_id)
+            response = self.client.get(url, headers=headers)
+            self.assertEqual(response.status_code, 401)
+
+    def test_get_jokes_another_user_token_auth__403_forbidden(self):
+        self.add_test_user_return_id()
+        other_user = {'username': 'other', 'password': 'other'}
+        other_user_id = self.add_test_user_return_id(other_user)
+        headers = self.get_token_auth_headers(self.get_token())
+        url = self.TEST_JOKES_ENDPOINT.format(other_user_id)
+        response = self.client.get(url, headers=headers)
+        self.assertEqual(response.status_code, 403)
+
+    def test_get_user_token_auth__200_OK(self):
+        user_id = self.add_test_user_return_id()
+        headers = self.get_token_auth_headers(self.get_token())
+        url = self.TEST_USER_ENDPOINT.format(user_id)
+        response = self.client.get(url, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['user']['username'], self.TEST_USERNAME)
+
+
+if __name__ == '__main__':
+    unittest.main()
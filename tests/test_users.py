@@ -1,9 +1,12 @@
 import base64
 import unittest
-from flask_app import app
+from flask_app import create_app
 from flask_app.models import UserModel, JokeModel, session
 
 
+app = create_app()
+
+
 class UsersTestCase(unittest.TestCase):
 
     TEST_USERS_ENDPOINT = 'v1/users'
@@ -26,9 +29,10 @@ class UsersTestCase(unittest.TestCase):
                      'password': self.TEST_PASSWORD}
 
     def tearDown(self):
-        session.query(JokeModel).delete()
-        session.query(UserModel).delete()
-        session.commit()
+        with app.app_context():
+            session.query(JokeModel).delete()
+            session.query(UserModel).delete()
+            session.commit()
 
     def test_get_users__405_not_allowed(self):
         response = self.client.get(self.TEST_USERS_ENDPOINT)
@@ -97,6 +101,15 @@ class UsersTestCase(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json['user']['username'], self.TEST_USERNAME)
 
+    def test_get_user_matching_etag__304_not_modified(self):
+        response = self.client.post(self.TEST_USERS_ENDPOINT, json=self.user)
+        url = self.TEST_USER_ENDPOINT.format(response.json['user']['id'])
+        headers = self.get_basic_auth_headers()
+        response = self.client.get(url, headers=headers)
+        headers['If-None-Match'] = response.headers['ETag']
+        response = self.client.get(url, headers=headers)
+        self.assertEqual(response.status_code, 304)
+
 if __name__ == '__main__':
     unittest.main()
 